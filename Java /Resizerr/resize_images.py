@@ -1,12 +1,20 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
-def batch_resize_images(input_folder, output_folder, target_width, target_height):
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def batch_resize_images(input_folder, output_folder, target_width, target_height,
+                        batched=False, batch_size=256, workers=None):
+    if batched:
+        return batch_resize_images_stacked(input_folder, output_folder, target_width,
+                                           target_height, batch_size, workers)
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     # Process only JPG, JPEG, PNG files
     for filename in os.listdir(input_folder):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+        if filename.lower().endswith(IMAGE_EXTENSIONS):
             input_path = os.path.join(input_folder, filename)
             output_path = os.path.join(output_folder, filename)
             try:
@@ -17,5 +25,94 @@ def batch_resize_images(input_folder, output_folder, target_width, target_height
             except Exception as e:
                 print(f"Error processing {filename}: {e}")
 
+
+def _area_weights(src, dst):
+    """Return a (dst, src) matrix whose rows average the source pixels each output pixel covers."""
+    import numpy as np
+
+    scale = src / dst
+    edges = np.arange(dst + 1) * scale
+    starts, ends = edges[:-1, None], edges[1:, None]
+    left = np.arange(src)[None, :]
+    overlap = np.clip(np.minimum(ends, left + 1) - np.maximum(starts, left), 0, None)
+    return (overlap / scale).astype(np.float32)
+
+
+def _resize_stack(stack, wy, wx):
+    """Resize an (N, H, W, C) stack with separable area filters in one vectorised operation."""
+    import numpy as np
+
+    stack = stack.astype(np.float32)
+    alpha = stack.shape[-1] == 4
+    if alpha:
+        # Premultiply so the colour of transparent pixels does not bleed into the edges
+        stack[..., :3] *= stack[..., 3:] / 255
+    out = np.einsum('yh,nhwc,xw->nyxc', wy, stack, wx, optimize=True)
+    if alpha:
+        coverage = out[..., 3:]
+        out[..., :3] = np.divide(out[..., :3] * 255, coverage, out=np.zeros_like(out[..., :3]),
+                                 where=coverage > 0)
+    return np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
+
+def batch_resize_images_stacked(input_folder, output_folder, target_width, target_height,
+                                batch_size=256, workers=None):
+    """Resize a folder of same-sized images in stacked NumPy batches.
+
+    Every image must share the resolution and mode of the first one; images that
+    do not are resized individually instead. Decoding and encoding run on a thread
+    pool, while the resize of each batch is a single area-averaging operation.
+    """
+    import numpy as np
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    filenames = sorted(f for f in os.listdir(input_folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+    if not filenames:
+        return
+
+    with Image.open(os.path.join(input_folder, filenames[0])) as first:
+        size, mode = first.size, first.mode
+    if mode not in ('L', 'RGB', 'RGBA'):
+        # Averaging palette indices or packed modes is meaningless, so fall back
+        return batch_resize_images(input_folder, output_folder, target_width, target_height)
+    wy = _area_weights(size[1], target_height)
+    wx = _area_weights(size[0], target_width)
+
+    def decode(filename):
+        try:
+            with Image.open(os.path.join(input_folder, filename)) as img:
+                if img.size != size or img.mode != mode:
+                    img.resize((target_width, target_height)).save(os.path.join(output_folder, filename))
+                    print(f"Resized: {filename} (size or mode differs, resized individually)")
+                    return filename, None
+                return filename, np.asarray(img)
+        except Exception as e:
+            print(f"Error processing {filename}: {e}")
+            return filename, None
+
+    def encode(filename, pixels):
+        try:
+            if pixels.shape[-1] == 1:
+                pixels = pixels[..., 0]
+            Image.fromarray(pixels).save(os.path.join(output_folder, filename))
+            print(f"Resized: {filename}")
+        except Exception as e:
+            print(f"Error processing {filename}: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(filenames), batch_size):
+            decoded = [(name, pixels) for name, pixels in
+                       pool.map(decode, filenames[start:start + batch_size]) if pixels is not None]
+            if not decoded:
+                continue
+            names = [name for name, _ in decoded]
+            stack = np.stack([pixels for _, pixels in decoded])
+            if stack.ndim == 3:
+                stack = stack[..., None]
+            resized = _resize_stack(stack, wy, wx)
+            list(pool.map(encode, names, resized))
+
 # Example usage
 # batch_resize_images("input_folder_path", "output_folder_path", 800, 600)
+# batch_resize_images("input_folder_path", "output_folder_path", 800, 600, batched=True)
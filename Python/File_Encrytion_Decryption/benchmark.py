@@ -0,0 +1,101 @@
+import os
+import time
+import argparse
+import tempfile
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from utils import (FileHeader, encrypt_stream, decrypt_stream, time_kdf, calibrate_iterations,
+                   format_bytes, DEFAULT_ITERATIONS, DEFAULT_CHUNK_SIZE)
+
+MODES = {
+    "CFB": lambda: modes.CFB(os.urandom(16)),
+    "CTR": lambda: modes.CTR(os.urandom(16)),
+    "GCM": lambda: modes.GCM(os.urandom(12)),
+}
+
+
+def parse_list(text):
+    """Parse a comma-separated list of numbers, e.g. "4,64,1024"."""
+    try:
+        return [int(part) for part in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected comma-separated numbers, e.g. 4,64,1024")
+
+
+def bench_cipher(mode_name, buffer_size, total_bytes):
+    """Encrypt `total_bytes` through one reused buffer of `buffer_size`; return bytes per second."""
+    key = os.urandom(32)
+    encryptor = Cipher(algorithms.AES(key), MODES[mode_name]()).encryptor()
+    in_buf = bytearray(os.urandom(buffer_size))
+    out_buf = bytearray(buffer_size + 15)
+    rounds = max(total_bytes // buffer_size, 1)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        encryptor.update_into(in_buf, out_buf)
+    encryptor.finalize()
+    return rounds * buffer_size / (time.perf_counter() - start)
+
+
+def bench_file(size, chunk_size, threads, folder):
+    """Encrypt and decrypt a random file of `size` bytes with a fixed key; return (enc, dec) bytes per second."""
+    key = os.urandom(32)
+    plain_path = os.path.join(folder, "plain.bin")
+    enc_path = os.path.join(folder, "plain.bin.enc")
+    with open(plain_path, "wb") as f:
+        for start in range(0, size, DEFAULT_CHUNK_SIZE):
+            f.write(os.urandom(min(DEFAULT_CHUNK_SIZE, size - start)))
+
+    start = time.perf_counter()
+    with open(plain_path, "rb") as src, open(enc_path, "wb") as dst:
+        encrypt_stream(key, FileHeader(os.urandom(16), chunk_size=chunk_size), src, dst, threads)
+    encrypt_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(enc_path, "rb") as src, open(os.devnull, "wb") as dst:
+        decrypt_stream(key, FileHeader.read(src), src, dst, threads)
+    decrypt_time = time.perf_counter() - start
+    return size / max(encrypt_time, 1e-9), size / max(decrypt_time, 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python benchmark.py [--buffers KB,...] [--file-sizes MB,...] "
+                                           "[--calibrate [MS]]")
+    parser.add_argument("--iterations", type=parse_list, default=[10_000, DEFAULT_ITERATIONS, 600_000],
+                        help="PBKDF2 iteration counts to time (default: 10000,100000,600000)")
+    parser.add_argument("--buffers", type=parse_list, default=[4, 64, 1024],
+                        help="cipher buffer sizes in KB (default: 4,64,1024)")
+    parser.add_argument("--data-mb", type=int, default=64,
+                        help="MB to push through each cipher/buffer combination (default: 64)")
+    parser.add_argument("--file-sizes", type=parse_list, default=[1, 16, 64],
+                        help="sizes in MB of the test files for the full file format (default: 1,16,64)")
+    parser.add_argument("--threads", type=int, default=1, help="threads for the file benchmark (default: 1)")
+    parser.add_argument("--calibrate", type=int, nargs="?", const=250, metavar="MS",
+                        help="only print the iteration count that takes MS milliseconds here (default: 250)")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        iterations = calibrate_iterations(args.calibrate / 1000)
+        seconds = time_kdf(iterations, repeat=1)
+        print(f"{iterations} PBKDF2 iterations take about {seconds * 1000:.0f} ms on this machine")
+        print(f"Use it with: python encryptor.py <file> --calibrate {args.calibrate}")
+        return
+
+    print("Key derivation (PBKDF2-HMAC-SHA256):")
+    for iterations in args.iterations:
+        seconds = time_kdf(iterations)
+        print(f"  {iterations:>9} iterations: {seconds * 1000:8.1f} ms")
+
+    print(f"\nCipher throughput (AES-256, {args.data_mb} MB per run):")
+    print("  buffer     " + "".join(f"{name:>14}" for name in MODES))
+    for kb in args.buffers:
+        speeds = [bench_cipher(name, kb * 1024, args.data_mb << 20) for name in MODES]
+        print(f"  {kb:>6} KB " + "".join(f"{format_bytes(speed) + '/s':>14}" for speed in speeds))
+
+    print(f"\nChunked file format (GCM, {format_bytes(DEFAULT_CHUNK_SIZE)} chunks, {args.threads} thread(s)):")
+    with tempfile.TemporaryDirectory() as folder:
+        for mb in args.file_sizes:
+            enc, dec = bench_file(mb << 20, DEFAULT_CHUNK_SIZE, args.threads, folder)
+            print(f"  {mb:>6} MB file: encrypt {format_bytes(enc)}/s, decrypt {format_bytes(dec)}/s")
+
+
+if __name__ == "__main__":
+    main()
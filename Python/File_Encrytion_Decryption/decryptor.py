@@ -1,29 +1,44 @@
+import os
 import sys
-from utils import generate_key, decrypt_data
+import time
+import argparse
+from utils import decrypt_file, decrypt_directory, decrypt_range_to, format_throughput, DecryptionError
+
+def parse_range(text):
+    """Parse "OFFSET:LENGTH" (bytes) into a tuple of ints."""
+    try:
+        offset, length = (int(part) for part in text.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected OFFSET:LENGTH in bytes, e.g. 1048576:4096")
+    if offset < 0 or length < 0:
+        raise argparse.ArgumentTypeError("offset and length must not be negative")
+    return offset, length
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python decryptor.py <encrypted_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(usage="python decryptor.py <encrypted_file_or_folder> [--threads N] [--workers N] "
+                                           "[--range OFFSET:LENGTH [-o OUTPUT]]")
+    parser.add_argument("file_path")
+    parser.add_argument("--threads", type=int, default=1, help="verify and decrypt chunks on N threads (default: 1)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="for a folder: number of files to decrypt at once (default: CPU count + 4)")
+    parser.add_argument("--range", type=parse_range, metavar="OFFSET:LENGTH",
+                        help="decrypt only these plaintext bytes, reading just the chunks that hold them")
+    parser.add_argument("-o", "--output", help="where to write the --range bytes (default: <file>.range)")
+    args = parser.parse_args()
 
-    file_path = sys.argv[1]
+    file_path = args.file_path
     password = input("Enter password: ")
 
-    with open(file_path, "rb") as f:
-        file_data = f.read()
-
-    # Extract salt and ciphertext
-    salt = file_data[:16]
-    ciphertext = file_data[16:]
-
-    # Generate key from password + salt
-    key, _ = generate_key(password, salt=salt)
-
-    try:
-        plaintext = decrypt_data(key, ciphertext)
-    except Exception as e:
-        print("Decryption failed! Wrong password or corrupted file.")
-        sys.exit(1)
+    # A folder is decrypted recursively: every .enc file inside it is restored
+    if os.path.isdir(file_path):
+        start = time.perf_counter()
+        done, failed, total = decrypt_directory(password, file_path, args.workers)
+        elapsed = time.perf_counter() - start
+        for path, error in failed:
+            print(f"Decryption failed for {path}! {error}")
+        print(f"Decrypted {done} files in folder: {file_path}")
+        print(f"Decrypted {format_throughput(total, elapsed)}")
+        sys.exit(1 if failed else 0)
 
     # Save decrypted file
     if file_path.endswith(".enc"):
@@ -31,10 +46,30 @@ def main():
     else:
         out_file = file_path + ".dec"
 
-    with open(out_file, "wb") as f:
-        f.write(plaintext)
+    if args.range:
+        offset, length = args.range
+        range_file = args.output or out_file + ".range"
+        try:
+            with open(range_file, "wb") as out:
+                written = decrypt_range_to(password, file_path, offset, length, out)
+        except DecryptionError as e:
+            os.remove(range_file)
+            print(f"Decryption failed! {e}")
+            sys.exit(1)
+        print(f"Decrypted bytes {offset}-{offset + written} to: {range_file}")
+        return
+
+    # Handles both the chunked format and files from older versions (salt + IV + CFB)
+    start = time.perf_counter()
+    try:
+        decrypt_file(password, file_path, out_file, threads=args.threads)
+    except DecryptionError as e:
+        print(f"Decryption failed! {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
 
     print(f"File decrypted successfully: {out_file}")
+    print(f"Decrypted {format_throughput(os.path.getsize(out_file), elapsed)} with {args.threads} thread(s)")
 
 if __name__ == "__main__":
     main()
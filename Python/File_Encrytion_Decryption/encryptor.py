@@ -1,31 +1,56 @@
-import sys
-from utils import generate_key, encrypt_data
 import os
+import time
+import argparse
+from utils import (encrypt_file, encrypt_directory, format_throughput, available_codecs, calibrate_iterations,
+                   DEFAULT_ITERATIONS)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python encryptor.py <file_path>")
-        sys.exit(1)
-
-    file_path = sys.argv[1]
+    parser = argparse.ArgumentParser(usage="python encryptor.py <file_or_folder> [--threads N] [--workers N] "
+                                           "[--compress CODEC] [--calibrate [MS]]")
+    parser.add_argument("file_path")
+    parser.add_argument("--threads", type=int, default=1, help="encrypt chunks on N threads (default: 1)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="for a folder: number of files to encrypt at once (default: CPU count + 4)")
+    parser.add_argument("--compress", choices=available_codecs(), default=None,
+                        help="compress each chunk before encrypting it; chunks that do not shrink are stored as is")
+    parser.add_argument("--calibrate", type=int, nargs="?", const=250, metavar="MS",
+                        help="pick the PBKDF2 iteration count that takes MS milliseconds on this machine "
+                             "(default: 250); it is stored in the file header")
+    args = parser.parse_args()
+
+    file_path = args.file_path
     password = input("Enter password: ")
 
-    # Read file
-    with open(file_path, "rb") as f:
-        data = f.read()
-
-    # Generate key
-    key, salt = generate_key(password)
-
-    # Encrypt
-    ciphertext = encrypt_data(key, data)
-
-    # Save encrypted file (prepend salt)
+    # The iteration count is recorded in the header, so decryption needs no option
+    iterations = DEFAULT_ITERATIONS
+    if args.calibrate:
+        iterations = calibrate_iterations(args.calibrate / 1000)
+        print(f"Using {iterations} PBKDF2 iterations (about {args.calibrate} ms to unlock on this machine)")
+
+    # A folder is encrypted recursively, deriving the password key only once
+    if os.path.isdir(file_path):
+        start = time.perf_counter()
+        done, failed, total = encrypt_directory(password, file_path, args.workers, iterations=iterations,
+                                                 compression=args.compress)
+        elapsed = time.perf_counter() - start
+        for path, error in failed:
+            print(f"Could not encrypt {path}: {error}")
+        print(f"Encrypted {done} files in folder: {file_path}")
+        print(f"Encrypted {format_throughput(total, elapsed)}")
+        return
+
+    # Encrypt chunk by chunk, so files of any size need only a small fixed buffer
     out_file = file_path + ".enc"
-    with open(out_file, "wb") as f:
-        f.write(salt + ciphertext)
+    start = time.perf_counter()
+    encrypt_file(password, file_path, out_file, iterations=iterations, threads=args.threads,
+                 compression=args.compress)
+    elapsed = time.perf_counter() - start
 
     print(f"File encrypted successfully: {out_file}")
+    print(f"Encrypted {format_throughput(os.path.getsize(file_path), elapsed)} with {args.threads} thread(s)")
+    if args.compress:
+        print(f"Compressed with {args.compress}: {os.path.getsize(out_file) / max(os.path.getsize(file_path), 1):.1%} "
+              "of the original size")
 
 if __name__ == "__main__":
     main()
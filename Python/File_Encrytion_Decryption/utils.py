@@ -1,10 +1,90 @@
+import io
+import lzma
 import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+from cryptography.exceptions import InvalidTag
 
-def generate_key(password: str, salt: bytes = None) -> tuple[bytes, bytes]:
+DEFAULT_ITERATIONS = 100_000
+# Headers are read before anything is authenticated, so a larger count is treated as
+# corruption instead of letting a damaged file run PBKDF2 for hours (20M is about 5 s today)
+MAX_ITERATIONS = 20_000_000
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1 MiB of plaintext per authenticated chunk
+
+# Chunked file format (version 2):
+#   header = MAGIC | version | flags | chunk_size | kdf_iterations | salt | nonce_prefix
+#   then chunks of AES-256-GCM ciphertext + 16-byte tag. Every chunk but the last
+#   holds exactly chunk_size bytes of plaintext; the last one is shorter (maybe
+#   empty). The nonce of chunk i is nonce_prefix | i | final flag, and the whole
+#   header is authenticated with every chunk, so reordered, dropped, truncated or
+#   appended chunks and edited headers all fail to decrypt.
+#   With FLAG_HKDF the header ends with a 16-byte file salt: the PBKDF2 output is a
+#   master key shared by a whole batch, and the file key is HKDF(master, file salt).
+#   With FLAG_COMPRESSED the header ends with a codec id byte. Each chunk is then
+#   stored as a 4-byte length (top bit = final flag) + ciphertext + tag, and its
+#   plaintext is a marker byte (raw or compressed) + the chunk data, so chunks
+#   that do not shrink are kept as they are. Since chunk sizes vary, the file ends
+#   with an index: the offset of every chunk (8 bytes each), the chunk count and
+#   INDEX_MAGIC. The index is not authenticated, but the nonce pins every chunk
+#   to its position, so a wrong offset can only make decryption fail.
+MAGIC = b"FENC"
+FORMAT_VERSION = 2
+HEADER = struct.Struct(">4sBBII16s7s")
+TAG_SIZE = 16
+FLAG_HKDF = 0x01
+FLAG_COMPRESSED = 0x02
+CHUNK_LENGTH = struct.Struct(">I")
+FINAL_BIT = 1 << 31
+CHUNK_RAW, CHUNK_COMPRESSED = 0, 1
+INDEX_MAGIC = b"FIDX"
+INDEX_TRAILER = struct.Struct(">I4s")
+
+
+def _zstd_codec():
+    """Return (compress, decompress) for zstd, or None if no zstd module is installed."""
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.compress, lambda data, limit: zstd.ZstdDecompressor().decompress(data, max_length=limit)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return (lambda data: zstandard.ZstdCompressor().compress(data),
+            lambda data, limit: zstandard.ZstdDecompressor().decompress(data, max_output_size=limit))
+
+
+# Compression codecs: name -> id stored in the header, and id -> (compress, decompress(data, limit)).
+# decompress never returns more than `limit` bytes, so a chunk cannot expand without bound.
+CODEC_IDS = {"zlib": 1, "lzma": 2, "zstd": 3}
+CODECS = {
+    1: (zlib.compress, lambda data, limit: zlib.decompressobj().decompress(data, limit)),
+    2: (lzma.compress, lambda data, limit: lzma.LZMADecompressor().decompress(data, max_length=limit)),
+}
+_zstd = _zstd_codec()
+if _zstd:
+    CODECS[3] = _zstd
+
+
+def available_codecs() -> list[str]:
+    return [name for name, codec_id in CODEC_IDS.items() if codec_id in CODECS]
+
+
+class DecryptionError(Exception):
+    """Raised when a file cannot be decrypted: wrong password, tampering or truncation."""
+
+
+def generate_key(password: str, salt: bytes = None, iterations: int = DEFAULT_ITERATIONS) -> tuple[bytes, bytes]:
     """
     Generate AES key from password using PBKDF2HMAC.
     Returns (key, salt)
@@ -15,12 +95,39 @@ def generate_key(password: str, salt: bytes = None) -> tuple[bytes, bytes]:
         algorithm=hashes.SHA256(),
         length=32,  # 256-bit AES key
         salt=salt,
-        iterations=100_000,
+        iterations=iterations,
         backend=default_backend()
     )
     key = kdf.derive(password.encode())
     return key, salt
 
+
+def time_kdf(iterations: int, repeat: int = 3) -> float:
+    """Return the best wall time in seconds of one generate_key call with `iterations`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generate_key("benchmark", b"\0" * 16, iterations)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def calibrate_iterations(target_seconds: float = 0.25) -> int:
+    """Pick the PBKDF2 iteration count that takes about `target_seconds` on this machine.
+
+    PBKDF2 cost is linear in the iteration count, so the probe count is doubled
+    until it runs long enough to time reliably and then scaled up. The result
+    is rounded to a multiple of 1000 and never drops below DEFAULT_ITERATIONS,
+    so a slow host or a small target cannot weaken the key, nor exceeds
+    MAX_ITERATIONS. The count is stored in the file header, so any machine can
+    still decrypt.
+    """
+    probe = 10_000
+    while (seconds := time_kdf(probe)) < target_seconds / 4 and probe < 1 << 24:
+        probe *= 2
+    iterations = round(target_seconds * probe / seconds / 1000) * 1000
+    return min(max(iterations, DEFAULT_ITERATIONS), MAX_ITERATIONS)
+
 def encrypt_data(key: bytes, plaintext: bytes) -> bytes:
     iv = os.urandom(16)  # AES block size
     cipher = Cipher(algorithms.AES(key), modes.CFB(iv), backend=default_backend())
@@ -35,3 +142,572 @@ def decrypt_data(key: bytes, ciphertext: bytes) -> bytes:
     decryptor = cipher.decryptor()
     plaintext = decryptor.update(actual_ciphertext) + decryptor.finalize()
     return plaintext
+
+
+class FileHeader:
+    """Parameters stored at the start of a chunked encrypted file."""
+
+    def __init__(self, salt: bytes, nonce_prefix: bytes = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 iterations: int = DEFAULT_ITERATIONS, flags: int = 0, file_salt: bytes = None,
+                 codec: int = 0):
+        if not 0 < iterations <= MAX_ITERATIONS:
+            raise ValueError(f"iterations must be between 1 and {MAX_ITERATIONS}")
+        self.salt = salt
+        self.nonce_prefix = nonce_prefix or os.urandom(7)
+        self.chunk_size = chunk_size
+        self.iterations = iterations
+        self.flags = flags | (FLAG_COMPRESSED if codec else 0)
+        self.codec = codec
+        if flags & FLAG_HKDF:
+            self.file_salt = file_salt or os.urandom(16)
+        else:
+            self.file_salt = None
+
+    def pack(self) -> bytes:
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, self.flags, self.chunk_size, self.iterations,
+                             self.salt, self.nonce_prefix)
+        if self.flags & FLAG_HKDF:
+            header += self.file_salt
+        if self.flags & FLAG_COMPRESSED:
+            header += bytes((self.codec,))
+        return header
+
+    @classmethod
+    def read(cls, src) -> "FileHeader":
+        """Read and parse the header at the current position of a binary stream."""
+        data = src.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise DecryptionError("File is too short to be encrypted.")
+        magic, version, flags, chunk_size, iterations, salt, nonce_prefix = HEADER.unpack(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise DecryptionError(f"Unsupported file format version {version}.")
+        if (not 0 < chunk_size <= 1 << 30 or not 0 < iterations <= MAX_ITERATIONS
+                or flags & ~(FLAG_HKDF | FLAG_COMPRESSED)):
+            raise DecryptionError("Corrupted header.")
+        file_salt = None
+        if flags & FLAG_HKDF:
+            file_salt = src.read(16)
+            if len(file_salt) < 16:
+                raise DecryptionError("File is too short to be encrypted.")
+        codec = 0
+        if flags & FLAG_COMPRESSED:
+            codec = src.read(1)
+            if not codec:
+                raise DecryptionError("File is too short to be encrypted.")
+            codec = codec[0]
+            if codec not in CODECS:
+                names = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+                if codec in names:
+                    raise DecryptionError(f"File is compressed with {names[codec]}, which is not installed.")
+                raise DecryptionError("Corrupted header.")
+        return cls(salt, nonce_prefix, chunk_size, iterations, flags, file_salt, codec)
+
+    def nonce(self, index: int, final: bool) -> bytes:
+        return self.nonce_prefix + struct.pack(">IB", index, final)
+
+
+def derive_file_key(master_key: bytes, file_salt: bytes) -> bytes:
+    """Derive a per-file AES key from a batch master key with HKDF-SHA256 (microseconds, not PBKDF2 cost)."""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=file_salt, info=b"FENC file key").derive(master_key)
+
+
+class KeyRing:
+    """Derives keys for one password, running PBKDF2 once per (salt, iterations).
+
+    Thread-safe, so a worker pool decrypting a batch of files that share a
+    master salt pays for the password derivation only once.
+    """
+
+    def __init__(self, password: str):
+        self.password = password
+        self.masters = {}
+        self.lock = threading.Lock()
+
+    def master_key(self, salt: bytes, iterations: int = DEFAULT_ITERATIONS) -> bytes:
+        with self.lock:
+            key = self.masters.get((salt, iterations))
+            if key is None:
+                key, _ = generate_key(self.password, salt, iterations)
+                self.masters[(salt, iterations)] = key
+            return key
+
+    def file_key(self, header: FileHeader) -> bytes:
+        key = self.master_key(header.salt, header.iterations)
+        return derive_file_key(key, header.file_salt) if header.flags & FLAG_HKDF else key
+
+
+def _read_full(src, view) -> int:
+    """Fill `view` from `src` unless EOF comes first; return the number of bytes read."""
+    total = 0
+    while total < len(view):
+        n = src.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+def _encrypt_chunk(key: bytes, header: FileHeader, aad: bytes, index: int, final: bool,
+                   plaintext, out_buf: bytearray, marker: bytes = b"") -> tuple[int, bytes]:
+    """Encrypt marker + one chunk into out_buf; return (ciphertext length, tag)."""
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(header.nonce(index, final))).encryptor()
+    encryptor.authenticate_additional_data(aad)
+    written = encryptor.update_into(marker, out_buf) if marker else 0
+    written += encryptor.update_into(plaintext, memoryview(out_buf)[written:])
+    encryptor.finalize()
+    return written, encryptor.tag
+
+
+def _encrypt_packed_chunk(key: bytes, header: FileHeader, aad: bytes, index: int, final: bool,
+                          plaintext, out_buf: bytearray) -> tuple[int, bytes]:
+    """Compress one chunk if that makes it smaller, then encrypt it with its marker byte."""
+    packed = CODECS[header.codec][0](plaintext)
+    if len(packed) < len(plaintext):
+        return _encrypt_chunk(key, header, aad, index, final, packed, out_buf, bytes((CHUNK_COMPRESSED,)))
+    return _encrypt_chunk(key, header, aad, index, final, plaintext, out_buf, bytes((CHUNK_RAW,)))
+
+
+def _decrypt_chunk(key: bytes, header: FileHeader, aad: bytes, index: int, final: bool,
+                   chunk, out_buf: bytearray) -> int:
+    """Verify and decrypt one chunk (ciphertext + tag) into out_buf; return the plaintext length."""
+    decryptor = Cipher(algorithms.AES(key), modes.GCM(header.nonce(index, final))).decryptor()
+    decryptor.authenticate_additional_data(aad)
+    written = decryptor.update_into(chunk[:-TAG_SIZE], out_buf)
+    try:
+        decryptor.finalize_with_tag(bytes(chunk[-TAG_SIZE:]))
+    except InvalidTag:
+        raise DecryptionError("Wrong password or corrupted file.") from None
+    return written
+
+
+def _decrypt_packed_chunk(key: bytes, header: FileHeader, aad: bytes, index: int, final: bool,
+                          chunk, out_buf: bytearray):
+    """Verify, decrypt and if needed decompress one chunk of a compressed file; return its plaintext."""
+    n = _decrypt_chunk(key, header, aad, index, final, chunk, out_buf)
+    payload = memoryview(out_buf)[1:n]
+    if n and out_buf[0] == CHUNK_COMPRESSED:
+        try:
+            payload = CODECS[header.codec][1](payload, header.chunk_size + 1)
+        except Exception as e:
+            raise DecryptionError("Corrupted compressed chunk.") from e
+    elif not n or out_buf[0] != CHUNK_RAW:
+        raise DecryptionError("Corrupted chunk.")
+    # Only the final chunk may be short, exactly as in uncompressed files
+    if len(payload) > header.chunk_size or (len(payload) == header.chunk_size) == final:
+        raise DecryptionError("Corrupted chunk.")
+    return payload
+
+
+def _run_ordered(read_chunk, work, write_result, threads: int, buffer_size: int) -> None:
+    """Run `work` on chunks in a thread pool and write the results in their original order.
+
+    read_chunk(index, in_buf) fills a buffer and returns (length, final).
+    work(index, final, in_view, out_buf) runs on a worker thread and
+    write_result(result, out_view) gets each result back in order. At most
+    2 * threads chunks are in flight, and their buffers are reused, so memory
+    stays bounded no matter how far the slowest chunk lags behind.
+    """
+    free = [(bytearray(buffer_size), bytearray(buffer_size + 15)) for _ in range(2 * threads)]
+    pending = deque()
+    index = 0
+    final = False
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while pending or not final:
+            while free and not final:
+                in_buf, out_buf = free.pop()
+                n, final = read_chunk(index, in_buf)
+                future = pool.submit(work, index, final, memoryview(in_buf)[:n], out_buf)
+                pending.append((future, in_buf, out_buf))
+                index += 1
+            future, in_buf, out_buf = pending.popleft()
+            try:
+                write_result(future.result(), memoryview(out_buf))
+            except BaseException:
+                for other, _, _ in pending:
+                    other.cancel()
+                raise
+            free.append((in_buf, out_buf))
+
+
+def encrypt_stream(key: bytes, header: FileHeader, src, dst, threads: int = 1) -> None:
+    """Encrypt the binary stream `src` into `dst` in the chunked format, with constant memory.
+
+    Plaintext is read into reusable buffers and ciphertext written from others,
+    so memory use depends only on header.chunk_size and `threads`, never on the
+    file size. With threads > 1, chunks are encrypted in parallel (the AES
+    work releases the GIL) and written back in order. If the header names a
+    codec, each chunk is compressed first (also on the worker threads) and
+    kept raw when compression does not make it smaller.
+    """
+    aad = header.pack()
+    dst.write(aad)
+    packed = bool(header.flags & FLAG_COMPRESSED)
+    offsets = []  # chunk positions for the index of a compressed file
+    position = len(aad)
+
+    def read_chunk(index, in_buf):
+        n = _read_full(src, memoryview(in_buf)[:header.chunk_size])
+        return n, n < header.chunk_size
+
+    def work(index, final, plaintext, out_buf):
+        encrypt = _encrypt_packed_chunk if packed else _encrypt_chunk
+        return (final, *encrypt(key, header, aad, index, final, plaintext, out_buf))
+
+    def write_result(result, out_view):
+        nonlocal position
+        final, written, tag = result
+        if packed:
+            offsets.append(position)
+            dst.write(CHUNK_LENGTH.pack((written + TAG_SIZE) | (FINAL_BIT if final else 0)))
+            position += CHUNK_LENGTH.size + written + TAG_SIZE
+        dst.write(out_view[:written])
+        dst.write(tag)
+
+    # Compressed chunks carry a marker byte, so leave room for chunk_size + 1 bytes
+    if threads > 1:
+        _run_ordered(read_chunk, work, write_result, threads, header.chunk_size + 1 + TAG_SIZE)
+    else:
+        in_buf = bytearray(header.chunk_size)
+        out_buf = bytearray(header.chunk_size + 1 + 15)  # update_into needs block_size - 1 spare bytes
+        index = 0
+        while True:
+            n, final = read_chunk(index, in_buf)
+            write_result(work(index, final, memoryview(in_buf)[:n], out_buf), memoryview(out_buf))
+            if final:
+                break
+            index += 1
+    if packed:
+        dst.write(struct.pack(f">{len(offsets)}Q", *offsets))
+        dst.write(INDEX_TRAILER.pack(len(offsets), INDEX_MAGIC))
+
+
+def _read_index_trailer(src, count: int) -> None:
+    """Check that exactly the chunk index of a compressed file with `count` chunks remains in `src`."""
+    expected = 8 * count + INDEX_TRAILER.size
+    data = src.read(expected + 1)
+    if len(data) != expected or INDEX_TRAILER.unpack(data[-INDEX_TRAILER.size:]) != (count, INDEX_MAGIC):
+        raise DecryptionError("Corrupted chunk index.")
+
+
+def decrypt_stream(key: bytes, header: FileHeader, src, dst, threads: int = 1) -> None:
+    """Decrypt chunked ciphertext from `src` (positioned after the header) into `dst`.
+
+    Each chunk is authenticated before any of its plaintext is written. Raises
+    DecryptionError on a wrong key, modified data, or a missing final chunk.
+    With threads > 1, chunks are verified and decrypted in parallel.
+    """
+    aad = header.pack()
+    if header.flags & FLAG_COMPRESSED:
+        chunk_len = header.chunk_size + 1 + TAG_SIZE
+
+        def read_chunk(index, in_buf):
+            prefix = src.read(CHUNK_LENGTH.size)
+            if len(prefix) < CHUNK_LENGTH.size:
+                raise DecryptionError("Encrypted file is truncated.")
+            (value,) = CHUNK_LENGTH.unpack(prefix)
+            n, final = value & ~FINAL_BIT, bool(value & FINAL_BIT)
+            if not TAG_SIZE < n <= chunk_len:
+                raise DecryptionError("Corrupted chunk.")
+            if _read_full(src, memoryview(in_buf)[:n]) < n:
+                raise DecryptionError("Encrypted file is truncated.")
+            if final:
+                _read_index_trailer(src, index + 1)
+            return n, final
+
+        def work(index, final, chunk, out_buf):
+            return _decrypt_packed_chunk(key, header, aad, index, final, chunk, out_buf)
+
+        def write_result(plaintext, out_view):
+            dst.write(plaintext)
+    else:
+        chunk_len = header.chunk_size + TAG_SIZE
+
+        def read_chunk(index, in_buf):
+            n = _read_full(src, memoryview(in_buf)[:chunk_len])
+            if n < TAG_SIZE:
+                raise DecryptionError("Encrypted file is truncated.")
+            final = n < chunk_len
+            if final and src.read(1):
+                raise DecryptionError("Unexpected data after the final chunk.")
+            return n, final
+
+        def work(index, final, chunk, out_buf):
+            return _decrypt_chunk(key, header, aad, index, final, chunk, out_buf)
+
+        def write_result(written, out_view):
+            dst.write(out_view[:written])
+
+    if threads > 1:
+        _run_ordered(read_chunk, work, write_result, threads, chunk_len)
+        return
+    in_buf = bytearray(chunk_len)
+    out_buf = bytearray(chunk_len + 15)
+    index = 0
+    while True:
+        n, final = read_chunk(index, in_buf)
+        write_result(work(index, final, memoryview(in_buf)[:n], out_buf), memoryview(out_buf))
+        if final:
+            return
+        index += 1
+
+
+def format_bytes(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.2f} {unit}"
+        num_bytes /= 1024
+
+
+def format_throughput(num_bytes: int, seconds: float) -> str:
+    return f"{format_bytes(num_bytes)} in {seconds:.2f} s ({format_bytes(num_bytes / max(seconds, 1e-9))}/s)"
+
+
+def decrypt_legacy_stream(key: bytes, src, dst, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Decrypt the old IV + AES-CFB layout (salt already consumed) through a fixed buffer.
+
+    The old format has no authentication, so a wrong password yields garbage, not an error.
+    """
+    iv = src.read(16)
+    decryptor = Cipher(algorithms.AES(key), modes.CFB(iv), backend=default_backend()).decryptor()
+    in_buf = bytearray(chunk_size)
+    out_buf = bytearray(chunk_size + 15)
+    in_view, out_view = memoryview(in_buf), memoryview(out_buf)
+    while n := src.readinto(in_buf):
+        dst.write(out_view[:decryptor.update_into(in_view[:n], out_buf)])
+    decryptor.finalize()
+
+
+def _codec_id(compression: str) -> int:
+    """Map a codec name (or None for no compression) to the id stored in the header."""
+    if not compression:
+        return 0
+    if compression not in CODEC_IDS:
+        raise ValueError(f"Unknown compression codec {compression!r}")
+    if CODEC_IDS[compression] not in CODECS:
+        raise ValueError(f"Compression codec {compression!r} is not installed")
+    return CODEC_IDS[compression]
+
+
+def encrypt_file(password: str, in_path: str, out_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 iterations: int = DEFAULT_ITERATIONS, threads: int = 1, compression: str = None) -> None:
+    """Encrypt a file of any size into the chunked AES-GCM format, optionally compressing each chunk first."""
+    codec = _codec_id(compression)
+    key, salt = generate_key(password, iterations=iterations)
+    header = FileHeader(salt, chunk_size=chunk_size, iterations=iterations, codec=codec)
+    with open(in_path, "rb") as src, open(out_path, "wb") as dst:
+        encrypt_stream(key, header, src, dst, threads)
+
+
+def decrypt_file(password, in_path: str, out_path: str, threads: int = 1) -> None:
+    """Decrypt a chunked or old-format file. Output is only kept if decryption fully succeeds.
+
+    `password` may also be a KeyRing, to reuse derived keys across many files.
+    """
+    keys = password if isinstance(password, KeyRing) else KeyRing(password)
+    tmp_path = out_path + ".part"
+    try:
+        with open(in_path, "rb") as src, open(tmp_path, "wb") as dst:
+            if src.read(len(MAGIC)) == MAGIC:
+                src.seek(0)
+                header = FileHeader.read(src)
+                decrypt_stream(keys.file_key(header), header, src, dst, threads)
+            else:
+                src.seek(0)
+                key = keys.master_key(src.read(16))
+                decrypt_legacy_stream(key, src, dst)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def chunk_layout(header: FileHeader, header_size: int, file_size: int) -> tuple[int, int]:
+    """Return (number of chunks, plaintext size) of a chunked file from its size on disk.
+
+    All chunks but the last hold exactly chunk_size bytes, so chunk i starts at
+    header_size + i * (chunk_size + TAG_SIZE): the fixed layout is the index
+    that lets a byte range be located without reading anything before it.
+    Compressed files have variable-size chunks and carry an explicit index instead.
+    """
+    stride = header.chunk_size + TAG_SIZE
+    body = file_size - header_size
+    if body < TAG_SIZE:
+        raise DecryptionError("Encrypted file is truncated.")
+    full, last = divmod(body - TAG_SIZE, stride)
+    if last >= header.chunk_size:
+        raise DecryptionError("Encrypted file is truncated.")
+    return full + 1, full * header.chunk_size + last
+
+
+def decrypt_range_to(password, path: str, offset: int, length: int, dst) -> int:
+    """Decrypt only the plaintext bytes [offset, offset + length) of `path` into `dst`.
+
+    For chunked files only the chunks covering the range are read and
+    authenticated (compressed files find them through their chunk index); a
+    range that reaches the end also authenticates the final chunk, so
+    truncation is detected. Old CFB files are handled too, since CFB decryption can start at any
+    block given the previous ciphertext block. `password` may be a KeyRing.
+    Returns the number of bytes written, which is less than `length` when the
+    range runs past the end of the file.
+    """
+    if offset < 0 or length < 0:
+        raise ValueError("offset and length must not be negative")
+    keys = password if isinstance(password, KeyRing) else KeyRing(password)
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as src:
+        if src.read(len(MAGIC)) != MAGIC:
+            src.seek(0)
+            key = keys.master_key(src.read(16))
+            plain_size = max(file_size - 32, 0)
+            end = min(offset + length, plain_size)
+            if end <= offset:
+                return 0
+            block = offset // 16
+            src.seek(16 + block * 16)  # the IV, or the ciphertext block before the range
+            iv = src.read(16)
+            decryptor = Cipher(algorithms.AES(key), modes.CFB(iv), backend=default_backend()).decryptor()
+            data = decryptor.update(src.read(end - block * 16))
+            return dst.write(data[offset - block * 16:])
+
+        src.seek(0)
+        header = FileHeader.read(src)
+        key = keys.file_key(header)
+        if header.flags & FLAG_COMPRESSED:
+            count, load_chunk = _indexed_chunks(key, header, src, file_size)
+        else:
+            count, load_chunk = _fixed_chunks(key, header, src, file_size)
+        # Plaintext chunk i always starts at i * chunk_size, whatever its size on disk.
+        # A range reaching the end must also prove that the final chunk is really final.
+        end = offset + length
+        first = min(offset // header.chunk_size, count - 1)
+        written = 0
+        for index in range(first, count):
+            chunk_start = index * header.chunk_size
+            if index > first and chunk_start >= end and not (index == count - 1 and chunk_start == end):
+                break
+            plaintext = load_chunk(index)
+            lo = max(offset - chunk_start, 0)
+            hi = min(end - chunk_start, len(plaintext))
+            if hi > lo:
+                written += dst.write(plaintext[lo:hi])
+        return written
+
+
+def _fixed_chunks(key: bytes, header: FileHeader, src, file_size: int):
+    """Return (chunk count, load(index) -> plaintext) for an uncompressed chunked file."""
+    header_size = src.tell()
+    count, _ = chunk_layout(header, header_size, file_size)
+    aad = header.pack()
+    stride = header.chunk_size + TAG_SIZE
+    in_buf = bytearray(stride)
+    out_buf = bytearray(header.chunk_size + 15)
+
+    def load(index):
+        src.seek(header_size + index * stride)
+        n = _read_full(src, memoryview(in_buf))
+        final = index == count - 1
+        if n < TAG_SIZE or (final and n == stride):
+            raise DecryptionError("Encrypted file is truncated.")
+        plain_len = _decrypt_chunk(key, header, aad, index, final, memoryview(in_buf)[:n], out_buf)
+        return memoryview(out_buf)[:plain_len]
+
+    return count, load
+
+
+def _indexed_chunks(key: bytes, header: FileHeader, src, file_size: int):
+    """Return (chunk count, load(index) -> plaintext) for a compressed file, using its chunk index."""
+    header_size = src.tell()
+    if file_size - header_size < INDEX_TRAILER.size:
+        raise DecryptionError("Encrypted file is truncated.")
+    src.seek(file_size - INDEX_TRAILER.size)
+    count, magic = INDEX_TRAILER.unpack(src.read(INDEX_TRAILER.size))
+    index_start = file_size - INDEX_TRAILER.size - 8 * count
+    if magic != INDEX_MAGIC or not count or index_start < header_size:
+        raise DecryptionError("Corrupted chunk index.")
+    aad = header.pack()
+    chunk_len = header.chunk_size + 1 + TAG_SIZE
+    in_buf = bytearray(chunk_len)
+    out_buf = bytearray(chunk_len + 15)
+
+    def load(index):
+        src.seek(index_start + 8 * index)
+        (position,) = struct.unpack(">Q", src.read(8))
+        src.seek(position)
+        prefix = src.read(CHUNK_LENGTH.size)
+        if position < header_size or len(prefix) < CHUNK_LENGTH.size:
+            raise DecryptionError("Corrupted chunk index.")
+        (value,) = CHUNK_LENGTH.unpack(prefix)
+        n, final = value & ~FINAL_BIT, index == count - 1
+        if not TAG_SIZE < n <= chunk_len or bool(value & FINAL_BIT) != final:
+            raise DecryptionError("Corrupted chunk.")
+        if _read_full(src, memoryview(in_buf)[:n]) < n:
+            raise DecryptionError("Encrypted file is truncated.")
+        return _decrypt_packed_chunk(key, header, aad, index, final, memoryview(in_buf)[:n], out_buf)
+
+    return count, load
+
+
+def decrypt_range(password, path: str, offset: int, length: int) -> bytes:
+    """Return the decrypted plaintext bytes [offset, offset + length) of an encrypted file."""
+    out = io.BytesIO()
+    decrypt_range_to(password, path, offset, length, out)
+    return out.getvalue()
+
+
+def _iter_files(folder: str, encrypted: bool):
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if name.endswith(".enc") == encrypted and not name.endswith(".part"):
+                yield os.path.join(root, name)
+
+
+def _run_batch(paths, job, workers: int) -> tuple[int, list, int]:
+    """Run job(path) -> bytes processed over a thread pool; return (done, [(path, error)], bytes)."""
+    done, failed, total = 0, [], 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(job, path): path for path in paths}
+        for future, path in futures.items():
+            try:
+                total += future.result()
+                done += 1
+            except (OSError, DecryptionError) as e:
+                failed.append((path, e))
+    return done, failed, total
+
+
+def encrypt_directory(password: str, folder: str, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      iterations: int = DEFAULT_ITERATIONS, compression: str = None) -> tuple[int, list, int]:
+    """Encrypt every file below `folder` (except .enc files) to <name>.enc next to it.
+
+    PBKDF2 runs once per call to give a master key; each file then gets its own
+    key from HKDF with a random per-file salt, so the cost per file is only the
+    AES work. Files are processed on a pool of `workers` threads.
+    Returns (files encrypted, [(path, error)], plaintext bytes).
+    """
+    codec = _codec_id(compression)
+    master_key, master_salt = generate_key(password, iterations=iterations)
+
+    def job(path):
+        header = FileHeader(master_salt, chunk_size=chunk_size, iterations=iterations, flags=FLAG_HKDF,
+                            codec=codec)
+        with open(path, "rb") as src, open(path + ".enc", "wb") as dst:
+            encrypt_stream(derive_file_key(master_key, header.file_salt), header, src, dst)
+        return os.path.getsize(path)
+
+    return _run_batch(list(_iter_files(folder, encrypted=False)), job, workers)
+
+
+def decrypt_directory(password: str, folder: str, workers: int = None) -> tuple[int, list, int]:
+    """Decrypt every .enc file below `folder` next to it, on a pool of `workers` threads.
+
+    Master keys are derived once per distinct salt, so a folder encrypted by
+    encrypt_directory costs a single PBKDF2 run. Old-format files still cost one each.
+    Returns (files decrypted, [(path, error)], plaintext bytes).
+    """
+    keys = KeyRing(password)
+
+    def job(path):
+        decrypt_file(keys, path, path[:-4])
+        return os.path.getsize(path[:-4])
+
+    return _run_batch(list(_iter_files(folder, encrypted=True)), job, workers)
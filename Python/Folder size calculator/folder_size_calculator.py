@@ -1,19 +1,556 @@
 import os
 import sys
+import gzip
+import json
+import stat
+import time
+import heapq
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import threading
+from collections import deque, Counter
 
-def get_folder_size(path):
-    total_size = 0
-    # Walk through all directories and files inside the given path
-    for dirpath, dirnames, filenames in os.walk(path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            # Check if file exists and is not a symbolic link
-            if not os.path.islink(fp) and os.path.exists(fp):
+
+class DirStats:
+    """Sizes gathered for one directory during a scan."""
+    __slots__ = ("files_size", "file_count", "subdirs", "total", "total_files", "total_dirs",
+                 "mtime_ns", "reused")
+
+    def __init__(self):
+        self.files_size = 0   # bytes of the files directly inside this directory
+        self.file_count = 0
+        self.subdirs = []     # full paths of the child directories
+        self.total = 0        # files_size plus the totals of all subdirectories
+        self.total_files = 0  # files anywhere below this directory
+        self.total_dirs = 0   # directories anywhere below this directory
+        self.mtime_ns = None  # directory mtime, recorded when a snapshot is kept
+        self.reused = False   # True when taken from the previous snapshot instead of read
+
+
+class ScanOptions:
+    """How file sizes are counted during a scan.
+
+    on_disk counts allocated blocks (st_blocks * 512) instead of the apparent
+    size, so sparse files count what they really use, and counts each file
+    with several hardlinks only once. one_filesystem skips subdirectories on
+    another device, like `du -x`. track_mtime records each directory's mtime
+    for snapshots, and `previous` maps directories of an earlier snapshot to
+    DirStats that are reused while the directory's mtime is unchanged.
+    """
+    __slots__ = ("on_disk", "one_filesystem", "root_dev", "seen_links", "lock", "track_mtime", "previous")
+
+    def __init__(self, on_disk=False, one_filesystem=False, root_dev=None, track_mtime=False, previous=None):
+        self.on_disk = on_disk
+        self.one_filesystem = one_filesystem
+        self.root_dev = root_dev
+        self.seen_links = set()  # dev << 64 | ino, only for files with more than one link
+        self.lock = threading.Lock()
+        self.track_mtime = track_mtime or bool(previous)
+        self.previous = previous or {}
+
+    def file_size(self, st):
+        """Return the size to count for a stat result, or None if it was already counted."""
+        if not self.on_disk:
+            return st.st_size
+        if st.st_nlink > 1:
+            key = st.st_dev << 64 | st.st_ino
+            with self.lock:
+                if key in self.seen_links:
+                    return None
+                self.seen_links.add(key)
+        return self.allocated(st)
+
+    @staticmethod
+    def allocated(st):
+        blocks = getattr(st, "st_blocks", None)
+        return st.st_size if blocks is None else blocks * 512
+
+
+DEFAULT_OPTIONS = ScanOptions()
+
+
+class FileReport:
+    """The `largest` biggest files and bytes per extension, in bounded memory.
+
+    A min-heap holds only the current top files, so a file's path is built only
+    when it beats the smallest of them; the extension counters grow with the
+    number of distinct extensions, not with the number of files.
+    """
+
+    def __init__(self, largest=0):
+        self.largest = largest
+        self.heap = []                    # (size, path), smallest first
+        self.ext_bytes = Counter()
+        self.ext_files = Counter()
+
+    def add(self, entry, size):
+        ext = os.path.splitext(entry.name)[1].lower() or "(none)"
+        self.ext_bytes[ext] += size
+        self.ext_files[ext] += 1
+        if self.largest:
+            if len(self.heap) < self.largest:
+                heapq.heappush(self.heap, (size, entry.path))
+            elif size > self.heap[0][0]:
+                heapq.heapreplace(self.heap, (size, entry.path))
+
+    def spawn(self):
+        """Return an empty report with the same limits, for one worker thread."""
+        return FileReport(self.largest)
+
+    def merge(self, other):
+        self.ext_bytes.update(other.ext_bytes)
+        self.ext_files.update(other.ext_files)
+        for item in other.heap:
+            if len(self.heap) < self.largest:
+                heapq.heappush(self.heap, item)
+            elif item[0] > self.heap[0][0]:
+                heapq.heapreplace(self.heap, item)
+
+    def largest_files(self):
+        return sorted(self.heap, reverse=True)
+
+
+def entry_stat(entry):
+    """Return entry.stat(follow_symlinks=False) with st_dev, st_ino and st_nlink filled in.
+
+    On Windows DirEntry.stat() leaves those fields 0, so the entry is
+    lstat-ed again to get them (one extra call, only where it is needed).
+    """
+    st = entry.stat(follow_symlinks=False)
+    if not st.st_ino and not st.st_dev:
+        st = os.lstat(entry.path)
+    return st
+
+
+def scan_directory(path, options=DEFAULT_OPTIONS, report=None):
+    """Read one directory with os.scandir and return (DirStats, [(file name, size)]).
+
+    Sizes come from the stat cached on each DirEntry (no extra stat calls on
+    Windows unless on_disk or one_filesystem need entry_stat, one lstat per file
+    elsewhere). Symbolic links are skipped. A
+    directory whose mtime matches options.previous is not read at all: no entry
+    was added, removed or renamed in it, so its earlier file totals and
+    subdirectory list are reused and an empty file list is returned. Every
+    counted file is also passed to `report` (a FileReport) when one is given.
+    """
+    stats = DirStats()
+    files = []
+    if options.on_disk or options.track_mtime:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            st = None
+        if st is not None:
+            stats.mtime_ns = st.st_mtime_ns
+            prev = options.previous.get(path)
+            if prev is not None and prev.mtime_ns == st.st_mtime_ns:
+                prev.reused = True
+                return prev, files
+            if options.on_disk:
+                # Like du, the blocks of the directory itself count towards it
+                stats.files_size = options.allocated(st)
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
                 try:
-                    total_size += os.path.getsize(fp) # Add file size (in bytes)
-                except (PermissionError, FileNotFoundError):
+                    if entry.is_dir(follow_symlinks=False):
+                        if options.one_filesystem and entry_stat(entry).st_dev != options.root_dev:
+                            continue
+                        stats.subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry_stat(entry) if options.on_disk else entry.stat(follow_symlinks=False)
+                        size = options.file_size(st)
+                        if size is None:
+                            continue
+                        stats.files_size += size
+                        stats.file_count += 1
+                        files.append((entry.name, size))
+                        if report is not None:
+                            report.add(entry, size)
+                except OSError:
                     pass
-    return total_size
+    except OSError:
+        pass
+    return stats, files
+
+
+def aggregate(tree, order):
+    """Fill in the DirStats totals bottom-up; `order` must list every parent before its children."""
+    for path in reversed(order):
+        stats = tree[path]
+        children = [tree[d] for d in stats.subdirs if d in tree]
+        stats.total = stats.files_size + sum(c.total for c in children)
+        stats.total_files = stats.file_count + sum(c.total_files for c in children)
+        stats.total_dirs = len(children) + sum(c.total_dirs for c in children)
+
+
+def parents_first(tree, path):
+    """Return the directories of `tree` below `path` ordered so parents precede children."""
+    order = []
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        order.append(current)
+        stack.extend(d for d in tree[current].subdirs if d in tree)
+    return order
+
+
+def scan_tree(path, options=DEFAULT_OPTIONS, report=None):
+    """Walk `path` once and return ({dir path: DirStats}, [(file name, size)] of the top level).
+
+    Every directory is read exactly once, and totals for all of them are
+    computed bottom-up afterwards, so sizes at any depth come from one pass.
+    A FileReport passed as `report` is filled in during the same pass.
+    """
+    tree = {}
+    order = []
+    stack = [path]
+    root_files = []
+    while stack:
+        current = stack.pop()
+        stats, files = scan_directory(current, options, report)
+        if current == path:
+            root_files = files
+        tree[current] = stats
+        order.append(current)
+        stack.extend(stats.subdirs)
+    aggregate(tree, order)
+    return tree, root_files
+
+
+def scan_tree_parallel(path, threads, options=DEFAULT_OPTIONS, report=None):
+    """Like scan_tree, but keep many directory reads in flight on `threads` threads.
+
+    Useful on network filesystems where every readdir/stat is a round trip.
+    Each thread owns a deque of directories to read, pushes the subdirectories
+    it finds onto it and, when it runs dry, steals from the other end of
+    another thread's deque. Threads fill their own partial trees (and
+    FileReports), which are merged and totalled once the walk is done.
+    """
+    queues = [deque() for _ in range(threads)]
+    queues[0].append(path)
+    partials = [{} for _ in range(threads)]
+    reports = [report.spawn() if report is not None else None for _ in range(threads)]
+    root_files = []
+    pending = [1]  # directories queued or being read
+    cond = threading.Condition()
+
+    def steal(i):
+        for j in range(1, threads):
+            try:
+                return queues[(i + j) % threads].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def worker(i):
+        own, part = queues[i], partials[i]
+        while True:
+            try:
+                current = own.pop()
+            except IndexError:
+                current = steal(i)
+            if current is None:
+                with cond:
+                    if pending[0] == 0:
+                        return
+                    cond.wait(0.05)
+                continue
+            stats, files = scan_directory(current, options, reports[i])
+            part[current] = stats
+            if current == path:
+                root_files.extend(files)
+            with cond:
+                # Count the subdirectories before publishing them: a thief could otherwise
+                # finish one and bring pending to 0 while work remains
+                pending[0] += len(stats.subdirs) - 1
+                own.extend(stats.subdirs)
+                if stats.subdirs or pending[0] == 0:
+                    cond.notify_all()
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+
+    tree = {}
+    for part in partials:
+        tree.update(part)
+    if report is not None:
+        for partial_report in reports:
+            report.merge(partial_report)
+    aggregate(tree, parents_first(tree, path))
+    return tree, root_files
+
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(snapshot_path, root, tree, options):
+    """Write the scan of `root` to a gzip JSON snapshot, with paths relative to root."""
+    dirs = {}
+    for path, stats in tree.items():
+        rel = os.path.relpath(path, root)
+        dirs[rel] = [stats.files_size, stats.file_count, stats.mtime_ns, stats.total,
+                     [os.path.basename(d) for d in stats.subdirs]]
+    data = {"version": SNAPSHOT_VERSION, "root": os.path.abspath(root),
+            "on_disk": options.on_disk, "one_filesystem": options.one_filesystem, "dirs": dirs}
+    tmp_path = snapshot_path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", errors="surrogateescape") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, snapshot_path)
+
+
+def load_snapshot(snapshot_path, root, options):
+    """Return {dir path: DirStats} from a snapshot of `root`, or {} if there is none usable.
+
+    A snapshot taken of another folder or with other counting options is ignored.
+    DirStats.total holds the total recorded at the time, for diffing.
+    """
+    try:
+        with gzip.open(snapshot_path, "rt", encoding="utf-8", errors="surrogateescape") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (data.get("version") != SNAPSHOT_VERSION or data.get("root") != os.path.abspath(root)
+            or data.get("on_disk") != options.on_disk or data.get("one_filesystem") != options.one_filesystem):
+        return {}
+    tree = {}
+    for rel, (files_size, file_count, mtime_ns, total, subdirs) in data["dirs"].items():
+        path = os.path.normpath(os.path.join(root, rel))
+        stats = tree[path] = DirStats()
+        stats.files_size, stats.file_count, stats.mtime_ns, stats.total = files_size, file_count, mtime_ns, total
+        stats.subdirs = [os.path.join(path, name) for name in subdirs]
+    return tree
+
+
+def top_growers(old_totals, tree, root, count=10):
+    """Return [(growth, path)] for the directories below root that grew most since old_totals.
+
+    A directory whose growth comes entirely from one subdirectory is left out in
+    favour of that subdirectory, so the list points at where the bytes landed.
+    """
+    growth = {path: stats.total - old_totals.get(path, 0) for path, stats in tree.items()}
+    candidates = []
+    for path, grew in growth.items():
+        if grew <= 0 or path == root:
+            continue
+        if any(growth.get(d) == grew for d in tree[path].subdirs):
+            continue
+        candidates.append((grew, path))
+    candidates.sort(reverse=True)
+    return candidates[:count]
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class FolderWatcher:
+    """Keep folder totals current from inotify events after one initial scan (Linux only).
+
+    Every directory gets an inotify watch and the last known size of every file
+    is kept, so a create/modify/delete/move event only changes the totals of
+    the directory it happened in and of its parents. Modified files are
+    stat-ed once per batch of events; new folders are scanned and removed
+    folders are dropped as whole subtrees. If the kernel event queue
+    overflows, the tree is scanned again from scratch. With on_disk, hardlinks
+    are only deduplicated in the initial scan.
+    """
+
+    def __init__(self, root, options=DEFAULT_OPTIONS):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            self._add_watch_c = libc.inotify_add_watch
+            self._rm_watch_c = libc.inotify_rm_watch
+            self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        except (OSError, AttributeError, TypeError):
+            # No C library (Windows) or one without inotify (macOS, BSD)
+            raise OSError("watch mode needs Linux inotify, which is not available on this system") from None
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root = os.path.abspath(root)
+        self.options = options
+        self.changed = True
+        self.watch_limit_hit = False
+        self._reset()
+        self.scan(self.root)
+
+    def _reset(self):
+        self.tree = {}
+        self.files = {}        # dir path -> {file name: counted size}
+        self.watches = {}      # watch descriptor -> dir path
+        self.dir_watch = {}    # dir path -> watch descriptor
+
+    def _watch(self, path):
+        wd = self._add_watch_c(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            if not self.watch_limit_hit:
+                self.watch_limit_hit = True
+                print(f"⚠️ Cannot watch '{path}': {os.strerror(ctypes.get_errno())} "
+                      "(raise fs.inotify.max_user_watches?)")
+            return
+        self.watches[wd] = path
+        self.dir_watch[path] = wd
+
+    def scan(self, top):
+        """Watch and scan the subtree at `top`, returning its DirStats (totals filled in)."""
+        order = []
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            self._watch(current)  # before reading, so nothing created meanwhile is missed
+            stats, files = scan_directory(current, self.options)
+            self.tree[current] = stats
+            self.files[current] = dict(files)
+            order.append(current)
+            stack.extend(stats.subdirs)
+        aggregate(self.tree, order)
+        return self.tree[top]
+
+    def _ancestors(self, path):
+        while True:
+            yield self.tree[path]
+            if path == self.root:
+                return
+            path = os.path.dirname(path)
+
+    def _apply(self, path, size, files, dirs):
+        for stats in self._ancestors(path):
+            stats.total += size
+            stats.total_files += files
+            stats.total_dirs += dirs
+        self.changed = True
+
+    def _add_dir(self, parent, path):
+        if path in self.tree or parent not in self.tree:
+            return
+        if self.options.one_filesystem:
+            try:
+                if os.lstat(path).st_dev != self.options.root_dev:
+                    return
+            except OSError:
+                return
+        sub = self.scan(path)
+        self.tree[parent].subdirs.append(path)
+        self._apply(parent, sub.total, sub.total_files, sub.total_dirs + 1)
+
+    def _remove_dir(self, parent, path):
+        sub = self.tree.get(path)
+        if sub is None:
+            return
+        self._apply(parent, -sub.total, -sub.total_files, -(sub.total_dirs + 1))
+        self.tree[parent].subdirs.remove(path)
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            stats = self.tree.pop(current, None)
+            self.files.pop(current, None)
+            wd = self.dir_watch.pop(current, None)
+            if wd is not None:
+                self.watches.pop(wd, None)
+                self._rm_watch_c(self.fd, wd)
+            if stats is not None:
+                stack.extend(stats.subdirs)
+
+    def _update_file(self, parent, name):
+        known = self.files.get(parent)
+        if known is None:
+            return
+        old = known.get(name)
+        try:
+            st = os.lstat(os.path.join(parent, name))
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            new = None  # gone, or a symlink, which scans skip too
+        else:
+            new = ScanOptions.allocated(st) if self.options.on_disk else st.st_size
+        if new == old:
+            return
+        stats = self.tree[parent]
+        if new is None:
+            del known[name]
+        else:
+            known[name] = new
+        size = (new or 0) - (old or 0)
+        count = (new is not None) - (old is not None)
+        stats.files_size += size
+        stats.file_count += count
+        self._apply(parent, size, count, 0)
+
+    def process(self, data):
+        """Apply a buffer of raw inotify events to the totals."""
+        dirty = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                print("⚠️ inotify queue overflowed, scanning again")
+                for wd in list(self.watches):
+                    self._rm_watch_c(self.fd, wd)
+                self._reset()
+                self.scan(self.root)
+                self.changed = True
+                return
+            parent = self.watches.get(wd)
+            if parent is None or mask & IN_IGNORED:
+                continue
+            if mask & IN_DELETE_SELF:
+                if parent == self.root:
+                    raise FileNotFoundError(f"'{self.root}' was deleted")
+                continue
+            path = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_dir(parent, path)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._remove_dir(parent, path)
+            elif name:
+                dirty.add((parent, name))
+        for parent, name in dirty:
+            self._update_file(parent, name)
+
+    def run(self, interval=5.0, depth=1, quota=None):
+        """Print the totals whenever they changed, at most once per `interval` seconds."""
+        while True:
+            if self.changed:
+                self.changed = False
+                root = self.tree[self.root]
+                print(f"\n[{time.strftime('%H:%M:%S')}] {self.root}")
+                print_tree(self.tree, self.root, depth)
+                print(f"Total: {format_size(root.total)} {describe_counts(root)}", flush=True)
+                if quota and root.total >= quota:
+                    print(f"⚠️ Quota warning: {format_size(root.total)} used of {format_size(quota)}", flush=True)
+            deadline = time.monotonic() + interval
+            while (remaining := deadline - time.monotonic()) > 0:
+                ready, _, _ = select.select([self.fd], [], [], remaining)
+                if ready:
+                    self.process(os.read(self.fd, 1 << 16))
+
+
+def get_folder_size(path):
+    return scan_tree(path)[0][path].total
 
 
 def format_size(size_in_bytes):
@@ -25,41 +562,129 @@ def format_size(size_in_bytes):
     return f"{size_in_bytes:.2f} PB"
 
 
-def main():
-    # Ensure a folder path is provided as command-line argument
-    if len(sys.argv) < 2:
-        print("Usage: python folder_size_calculator.py <folder_path>")
-        sys.exit(1)
+def describe_counts(stats):
+    return f"({stats.total_files:,} files, {stats.total_dirs:,} folders)"
+
+
+def print_tree(tree, path, depth, level=1):
+    """Print the subdirectories of `path` down to `depth` levels, indented per level."""
+    for sub in tree[path].subdirs:
+        if sub not in tree:
+            continue
+        stats = tree[sub]
+        name = "  " * (level - 1) + os.path.basename(sub) + "/"
+        print(name.ljust(45) + f"= {format_size(stats.total)}".ljust(14) + describe_counts(stats))
+        if level < depth:
+            print_tree(tree, sub, depth, level + 1)
+
 
-    folder_path = sys.argv[1] # Read the folder path from arguments
+def print_report(report, folder_path, by_ext, ext_rows=20):
+    if report.largest:
+        print(f"\nLargest {report.largest} files:")
+        for size, path in report.largest_files():
+            print(f"{format_size(size)}".ljust(14) + os.path.relpath(path, folder_path))
+    if by_ext:
+        print("\nSize by extension:")
+        for ext, size in report.ext_bytes.most_common(ext_rows):
+            print(f"{ext}".ljust(20) + f"= {format_size(size)}".ljust(14) + f"({report.ext_files[ext]:,} files)")
+        if len(report.ext_bytes) > ext_rows:
+            print(f"... and {len(report.ext_bytes) - ext_rows:,} more extensions")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate the size of a folder and its contents.")
+    parser.add_argument("folder_path", help="folder to measure")
+    parser.add_argument("--depth", type=int, default=1,
+                        help="how many levels of subfolders to list (default: %(default)s)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="directories to read in parallel, useful on NFS/SMB (default: %(default)s)")
+    parser.add_argument("--on-disk", action="store_true",
+                        help="count allocated disk space instead of file sizes; hardlinks are counted once")
+    parser.add_argument("-x", "--one-file-system", action="store_true",
+                        help="skip folders on other filesystems")
+    parser.add_argument("--largest", type=int, default=0, metavar="N",
+                        help="also list the N largest files")
+    parser.add_argument("--by-ext", action="store_true", help="also show bytes and file counts per extension")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="compare with the snapshot in FILE (if any), show the top growers and save a new one")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of growing folders to show with --snapshot (default: %(default)s)")
+    parser.add_argument("--full-rescan", action="store_true",
+                        help="with --snapshot, read every folder even if its mtime is unchanged")
+    parser.add_argument("--watch", action="store_true",
+                        help="after the first scan, keep the totals updated from inotify events (Linux)")
+    parser.add_argument("--interval", type=float, default=5.0,
+                        help="with --watch, seconds between updates (default: %(default)s)")
+    parser.add_argument("--quota-gb", type=float, help="with --watch, warn when the total reaches this size")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    # Read the folder path from arguments; normalised so "dir/", "./dir" and "dir" give the
+    # same tree keys as the paths rebuilt from a snapshot
+    folder_path = os.path.normpath(args.folder_path)
 
     if not os.path.exists(folder_path):
         print(f"Error: The path '{folder_path}' does not exist.")
         sys.exit(1)
 
+    if args.watch:
+        options = ScanOptions(args.on_disk, args.one_file_system, os.stat(folder_path).st_dev)
+        print(f"\nWatching folder sizes inside: {folder_path} (Ctrl+C to stop)")
+        try:
+            FolderWatcher(folder_path, options).run(args.interval, args.depth,
+                                                    args.quota_gb * 1024 ** 3 if args.quota_gb else None)
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            # inotify missing or out of resources, or the watched folder itself was deleted
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
     print(f"\nCalculating folder sizes inside: {folder_path}\n")
 
-    total_size = 0 # Variable to store total folder size
+    options = ScanOptions(args.on_disk, args.one_file_system, os.stat(folder_path).st_dev,
+                          track_mtime=bool(args.snapshot))
+    previous = load_snapshot(args.snapshot, folder_path, options) if args.snapshot else {}
+    old_totals = {path: stats.total for path, stats in previous.items()}
+    report = FileReport(args.largest) if args.largest or args.by_ext else None
+    # Reused folders are not read, so file listings need every folder to be read
+    if previous and not args.full_rescan and report is None:
+        # The top level is always read so its files can be listed
+        options.previous = {path: stats for path, stats in previous.items() if path != folder_path}
 
-    # Loop through everything inside the given folder
-    for item in os.listdir(folder_path):
-        item_path = os.path.join(folder_path, item)
-        if os.path.isdir(item_path):
-            size = get_folder_size(item_path)
-            print(f"{item}/".ljust(45) + f"= {format_size(size)}")
-            total_size += size
+    # One traversal gives the size of every directory at every depth
+    if args.threads > 1:
+        tree, root_files = scan_tree_parallel(folder_path, args.threads, options, report)
+    else:
+        tree, root_files = scan_tree(folder_path, options, report)
+    print_tree(tree, folder_path, args.depth)
+
+    # Files directly inside the folder are listed with their own size
+    for name, size in root_files:
+        print(f"{name}".ljust(45) + f"= {format_size(size)}")
 
-        # If the item is a file — get its direct size
-        elif os.path.isfile(item_path):
-            try:
-                size = os.path.getsize(item_path)
-                print(f"{item}".ljust(45) + f"= {format_size(size)}")
-                total_size += size
-            except (PermissionError, FileNotFoundError):
-                pass
-            
     # Finally, print total folder size
-    print(f"Total size of '{folder_path}': {format_size(total_size)}")
+    root = tree[folder_path]
+    print(f"Total size of '{folder_path}': {format_size(root.total)} {describe_counts(root)}")
+
+    if report is not None:
+        print_report(report, folder_path, args.by_ext)
+
+    if args.snapshot:
+        if previous:
+            reused = sum(stats.reused for stats in tree.values())
+            print(f"\nReused {reused:,} of {len(tree):,} folders unchanged since the last snapshot.")
+            change = root.total - old_totals.get(folder_path, 0)
+            print(f"Change since last snapshot: {'+' if change >= 0 else '-'}{format_size(abs(change))}")
+            growers = top_growers(old_totals, tree, folder_path, args.top)
+            if growers:
+                print("\nTop growing folders:")
+                for grew, path in growers:
+                    print(f"+{format_size(grew)}".ljust(14) + os.path.relpath(path, folder_path))
+        save_snapshot(args.snapshot, folder_path, tree, options)
 
 if __name__ == "__main__":
     main()
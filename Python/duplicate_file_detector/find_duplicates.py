@@ -1,20 +1,733 @@
 import os
+import re
+import sys
+import gzip
+import heapq
+import random
+import socket
+import time
+import stat
+import sqlite3
+import shutil
 import hashlib
+import argparse
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-def get_file_hash(path, chunk_size=8192):
-    """Generate SHA256 hash for a file."""
-    h = hashlib.sha256()
+DEFAULT_ALGORITHM = "sha256"
+DEFAULT_BUFFER_SIZE = 1 << 20  # 1 MB reads keep NVMe and NFS busy
+
+_local = threading.local()
+
+def _read_buffer(size):
+    """Return a per-thread bytearray of the given size, reused between files."""
+    buf = getattr(_local, "buffer", None)
+    if buf is None or len(buf) != size:
+        buf = _local.buffer = bytearray(size)
+    return buf
+
+def get_file_hash(path, chunk_size=DEFAULT_BUFFER_SIZE, algorithm=DEFAULT_ALGORITHM, progress=None):
+    """Generate a hash (SHA256 by default) for a file, reading into a reused buffer."""
+    h = hashlib.new(algorithm)
+    buf = _read_buffer(chunk_size)
+    view = memoryview(buf)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while n := f.readinto(buf):
+                h.update(view[:n])
+                if progress:
+                    progress.update(n)
+        return h.hexdigest()
+    except (PermissionError, FileNotFoundError):
+        return None
+
+def get_partial_hash(path, size, sample_size=65536, algorithm=DEFAULT_ALGORITHM):
+    """Hash the first and last sample_size bytes of a file (the whole file if it is small).
+
+    For files no larger than 2 * sample_size the result equals get_file_hash(path).
+    """
+    h = hashlib.new(algorithm)
     try:
         with open(path, "rb") as f:
-            while chunk := f.read(chunk_size):
-                h.update(chunk)
+            if size <= 2 * sample_size:
+                while chunk := f.read(sample_size):
+                    h.update(chunk)
+            else:
+                h.update(f.read(sample_size))
+                f.seek(-sample_size, os.SEEK_END)
+                h.update(f.read(sample_size))
         return h.hexdigest()
     except (PermissionError, FileNotFoundError):
         return None
 
-def scan_folder(folder_path, mode="hash"):
-    """Scan folder and find duplicates based on mode ('name', 'size', or 'hash')."""
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+class HashProgress:
+    """Thread-safe byte counter that prints a live progress line with throughput."""
+
+    def __init__(self, total_bytes, interval=0.5):
+        self.total = total_bytes
+        self.done = 0
+        self.interval = interval
+        self.start = self.last_print = time.monotonic()
+        self.lock = threading.Lock()
+
+    def update(self, n):
+        with self.lock:
+            self.done += n
+            now = time.monotonic()
+            if now - self.last_print >= self.interval:
+                self.last_print = now
+                self._print(now)
+
+    def _print(self, now):
+        rate = self.done / max(now - self.start, 1e-9)
+        print(f"\r⏳ Hashed {format_bytes(self.done)} / {format_bytes(self.total)} "
+              f"({format_bytes(rate)}/s)   ", end="", flush=True)
+
+    def close(self):
+        with self.lock:
+            self._print(time.monotonic())
+        print()
+
+def hash_files(paths, algorithm=DEFAULT_ALGORITHM, buffer_size=DEFAULT_BUFFER_SIZE,
+               workers=None, show_progress=False, total_bytes=None):
+    """Hash many files on a thread pool and return {path: digest or None}.
+
+    hashlib releases the GIL while hashing, so threads overlap disk reads and
+    hashing. show_progress prints a live bytes/s line to stdout; pass total_bytes
+    when the sizes are already known to avoid stat-ing every file again.
+    """
+    paths = list(paths)
+    progress = None
+    if show_progress and paths:
+        if total_bytes is None:
+            total_bytes = 0
+            for path in paths:
+                try:
+                    total_bytes += os.path.getsize(path)
+                except OSError:
+                    pass
+        progress = HashProgress(total_bytes)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        digests = pool.map(lambda p: get_file_hash(p, buffer_size, algorithm, progress), paths)
+        results = dict(zip(paths, digests))
+    if progress:
+        progress.close()
+    return results
+
+def iter_files(folder_path):
+    """Yield (path, stat_result) for every file below folder_path.
+
+    Symbolic links are skipped: a link shares its target's inode and content, so
+    it would otherwise be grouped with the target and deleting "duplicates" could
+    remove the real file and keep the link.
+    """
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            file_path = os.path.join(root, file)
+            try:
+                st = os.lstat(file_path)
+            except OSError:
+                continue
+            if not stat.S_ISLNK(st.st_mode):
+                yield file_path, st
+
+def group_by_inode(entries):
+    """Map (st_dev, st_ino) to the paths that are hardlinks of the same file."""
+    inodes = defaultdict(list)
+    for path, st in entries:
+        inodes[(st.st_dev, st.st_ino)].append(path)
+    return inodes
+
+class HashCache:
+    """On-disk SQLite cache of file digests for incremental rescans.
+
+    Rows are keyed by (device, inode, algorithm, kind) and store the size and
+    mtime_ns seen when the digest was computed; a lookup whose size or mtime
+    differs invalidates the row. Rows for files that have disappeared from a
+    scanned folder are pruned with prune().
+    """
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS hashes (
+            dev INTEGER, ino INTEGER, algorithm TEXT, kind TEXT,
+            size INTEGER, mtime_ns INTEGER, path TEXT, digest TEXT,
+            PRIMARY KEY (dev, ino, algorithm, kind))""")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, st, algorithm, kind):
+        row = self.db.execute(
+            "SELECT size, mtime_ns, digest FROM hashes WHERE dev=? AND ino=? AND algorithm=? AND kind=?",
+            (st.st_dev, st.st_ino, algorithm, kind)).fetchone()
+        if row and row[:2] == (st.st_size, st.st_mtime_ns):
+            self.hits += 1
+            return row[2]
+        if row:
+            self.db.execute("DELETE FROM hashes WHERE dev=? AND ino=? AND algorithm=? AND kind=?",
+                            (st.st_dev, st.st_ino, algorithm, kind))
+        self.misses += 1
+        return None
+
+    def put(self, st, path, algorithm, kind, digest):
+        self.db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (st.st_dev, st.st_ino, algorithm, kind, st.st_size, st.st_mtime_ns, path, digest))
+
+    def prune(self, folder_path, stats):
+        """Delete rows under folder_path for files that are gone or whose size/mtime changed.
+
+        stats maps (dev, ino) to the stat_result of every file seen in this scan.
+        """
+        prefix = os.path.join(os.path.abspath(folder_path), "")
+        stale = []
+        for dev, ino, size, mtime_ns in self.db.execute(
+                "SELECT dev, ino, size, mtime_ns FROM hashes WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)):
+            st = stats.get((dev, ino))
+            if st is None or (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                stale.append((dev, ino))
+        self.db.executemany("DELETE FROM hashes WHERE dev=? AND ino=?", stale)
+        return len(stale)
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        print(f"💾 Hash cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)")
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+def find_hash_duplicates(folder_path, sample_size=65536, algorithm=DEFAULT_ALGORITHM,
+                         buffer_size=DEFAULT_BUFFER_SIZE, workers=None, show_progress=False,
+                         cache=None):
+    """Find files with identical content in stages: size, then partial hash, then full hash.
+
+    Files with a unique size are never read. Same-size files get a head+tail
+    partial hash, and only partial-hash collisions are hashed in full. Paths that
+    are hardlinks of one inode are read once; a group made only of hardlinks is
+    not read at all and is keyed by "inode:<dev>:<ino>" instead of a digest.
+    Partial and full hashes are computed on a thread pool of `workers` threads.
+    With a HashCache, digests of unchanged files are reused instead of re-read.
+    """
+    if cache:
+        folder_path = os.path.abspath(folder_path)
+    by_size = defaultdict(list)
+    stats = {}  # (dev, ino) -> stat_result
+    for path, st in iter_files(folder_path):
+        by_size[st.st_size].append((path, st))
+        stats[(st.st_dev, st.st_ino)] = st
+
+    duplicates = {}
+    inodes = {}  # (dev, ino) -> paths, for every inode that still needs hashing
+    for size, entries in by_size.items():
+        if len(entries) < 2:
+            continue
+        size_inodes = group_by_inode(entries)
+        if size == 0:
+            duplicates[hashlib.new(algorithm).hexdigest()] = [p for paths in size_inodes.values() for p in paths]
+        elif len(size_inodes) == 1:
+            (dev, ino), paths = size_inodes.popitem()
+            duplicates[f"inode:{dev}:{ino}"] = paths
+        else:
+            for inode, paths in size_inodes.items():
+                inodes[inode] = (size, paths)
+
+    partial_kind = f"partial:{sample_size}"
+    partials = {}
+    if cache:
+        for inode in inodes:
+            partials[inode] = cache.get(stats[inode], algorithm, partial_kind)
+    missing = [inode for inode in inodes if not partials.get(inode)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for inode, partial in zip(missing, pool.map(
+                lambda inode: get_partial_hash(inodes[inode][1][0], inodes[inode][0], sample_size, algorithm),
+                missing)):
+            partials[inode] = partial
+            if cache and partial:
+                cache.put(stats[inode], inodes[inode][1][0], algorithm, partial_kind, partial)
+    by_partial = defaultdict(list)
+    for inode, partial in partials.items():
+        if partial:
+            by_partial[(inodes[inode][0], partial)].append(inode)
+
+    by_full = defaultdict(list)
+    to_hash = {}  # representative path -> inode
+    for (size, partial), candidates in by_partial.items():
+        if len(candidates) < 2:
+            continue
+        for inode in candidates:
+            if size <= 2 * sample_size:
+                # The partial hash already covered the whole file
+                by_full[partial].extend(inodes.pop(inode)[1])
+            elif cache and (full := cache.get(stats[inode], algorithm, "full")):
+                by_full[full].extend(inodes.pop(inode)[1])
+            else:
+                to_hash[inodes[inode][1][0]] = inode
+    digests = hash_files(to_hash, algorithm, buffer_size, workers, show_progress,
+                         total_bytes=sum(inodes[i][0] for i in to_hash.values()))
+    for path, full in digests.items():
+        if full:
+            inode = to_hash[path]
+            if cache:
+                cache.put(stats[inode], path, algorithm, "full", full)
+            by_full[full].extend(inodes.pop(inode)[1])
+    duplicates.update((k, v) for k, v in by_full.items() if len(v) > 1)
+
+    for (dev, ino), (_, paths) in inodes.items():
+        if len(paths) > 1:
+            duplicates[f"inode:{dev}:{ino}"] = paths
+    if cache:
+        cache.prune(folder_path, stats)
+    return duplicates
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tif", ".tiff", ".webp")
+
+_dct_matrix = None
+
+def get_image_phash(path, size=32, hash_size=8):
+    """Return a 64-bit perceptual hash (DCT of a grayscale thumbnail) as an int, or None.
+
+    Needs Pillow and NumPy. Bits are set where a low-frequency DCT coefficient is
+    above the median, so resized or recompressed copies hash to nearby values.
+    """
+    global _dct_matrix
+    import numpy as np
+    from PIL import Image
+
+    if _dct_matrix is None or _dct_matrix.shape[0] != size:
+        k = np.arange(size)
+        _dct_matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size))
+    try:
+        with Image.open(path) as img:
+            pixels = np.asarray(img.convert("L").resize((size, size), Image.LANCZOS), dtype=np.float64)
+    except Exception:
+        return None
+    low = (_dct_matrix @ pixels @ _dct_matrix.T)[:hash_size, :hash_size].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance.
+
+    Nodes are [hash, {distance: child}]; a radius search only descends into
+    children whose edge distance is within radius of the query distance, so
+    lookups touch a small fraction of the tree.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value):
+        if self.root is None:
+            self.root = [value, {}]
+            return
+        node = self.root
+        while True:
+            d = (node[0] ^ value).bit_count()
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [value, {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """Return every stored hash within `radius` bits of value."""
+        found, stack = [], [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = (node[0] ^ value).bit_count()
+            if d <= radius:
+                found.append(node[0])
+            for edge, child in node[1].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return found
+
+def find_similar_images(folder_path, max_distance=6, workers=None):
+    """Group visually similar images whose perceptual hashes differ by at most max_distance bits.
+
+    Hashes are computed in a process pool, indexed in a BKTree and grouped with
+    union-find, so each image is compared only with its near neighbours.
+    """
+    paths = [path for path, _ in iter_files(folder_path) if path.lower().endswith(IMAGE_EXTENSIONS)]
+    by_hash = defaultdict(list)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, phash in zip(paths, pool.map(get_image_phash, paths, chunksize=64)):
+            if phash is not None:
+                by_hash[phash].append(path)
+
+    tree = BKTree()
+    for phash in by_hash:
+        tree.add(phash)
+    parent = {phash: phash for phash in by_hash}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for phash in by_hash:
+        for other in tree.search(phash, max_distance):
+            parent[find(other)] = find(phash)
+
+    groups = defaultdict(list)
+    for phash, group_paths in by_hash.items():
+        groups[find(phash)].extend(group_paths)
+    return {f"phash:{root:016x}": v for root, v in groups.items() if len(v) > 1}
+
+_GEAR_RNG = random.Random(0x6765617200)
+_GEAR = [_GEAR_RNG.getrandbits(64) for _ in range(256)]
+_MASK64 = (1 << 64) - 1
+_gear_array = None
+
+def _gear_candidates_numpy(block, tail, mask):
+    """Return (cuts, tail): offsets just past every byte of block where the gear hash has mask bits zero.
+
+    The gear hash after byte i is sum(gear[b[i - k]] << k for k < 64) mod 2**64, so
+    it is computed for 64 KB at a time (small enough to stay in cache) by doubling
+    the window six times; uint64 arithmetic wraps exactly like the scalar hash.
+    tail holds the gear values of the 63 bytes before block.
+    """
+    global _gear_array
+    import numpy as np
+
+    if _gear_array is None:
+        _gear_array = np.array(_GEAR, dtype=np.uint64)
+    if tail is None:
+        tail = np.zeros(63, dtype=np.uint64)
+    codes = np.frombuffer(block, dtype=np.uint8)
+    cuts = []
+    for offset in range(0, len(codes), 1 << 16):
+        h = np.concatenate((tail, _gear_array[codes[offset:offset + (1 << 16)]]))
+        tail = h[-63:].copy()
+        for w in (1, 2, 4, 8, 16, 32):
+            h[w:] += h[:-w] << np.uint64(w)
+        cuts.append(np.flatnonzero((h[63:] & np.uint64(mask)) == 0) + (offset + 1))
+    return np.concatenate(cuts).tolist(), tail
+
+def _gear_candidates_python(block, h, mask):
+    """Pure-Python version of _gear_candidates_numpy; the state is the running hash instead of a tail."""
+    gear = _GEAR
+    cuts = []
+    for i, byte in enumerate(block, 1):
+        h = ((h << 1) + gear[byte]) & _MASK64
+        if not h & mask:
+            cuts.append(i)
+    return cuts, h
+
+def iter_chunks(f, avg_size=8192, min_size=2048, max_size=65536, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Split an open binary file into content-defined chunks, yielding (digest, length).
+
+    A gear rolling hash over the last 64 bytes declares a boundary where its top
+    log2(avg_size) bits are zero, so an insertion only shifts the chunks around it.
+    Boundaries closer than min_size to the start of a chunk are skipped and chunks
+    never exceed max_size. Boundary candidates are found per block with NumPy when
+    it is installed (hundreds of MB/s) and byte by byte otherwise. Only one
+    buffer_size block is held in memory at a time; digests are 8-byte BLAKE2b values.
+    """
+    try:
+        import numpy  # noqa: F401
+        candidates, state = _gear_candidates_numpy, None
+    except ImportError:
+        candidates, state = _gear_candidates_python, 0
+    bits = avg_size.bit_length() - 1
+    mask = ((1 << bits) - 1) << (64 - bits)
+    length = 0
+    hasher = hashlib.blake2b(digest_size=8)
+    while block := f.read(buffer_size):
+        view = memoryview(block)
+        n = len(block)
+        cuts, state = candidates(block, state, mask)
+        start = -length  # where the current chunk began, relative to this block
+        for cut in cuts:
+            while cut - start > max_size:
+                hasher.update(view[max(start, 0):start + max_size])
+                yield hasher.digest(), max_size
+                hasher = hashlib.blake2b(digest_size=8)
+                start += max_size
+            if cut - start > min_size:
+                hasher.update(view[max(start, 0):cut])
+                yield hasher.digest(), cut - start
+                hasher = hashlib.blake2b(digest_size=8)
+                start = cut
+        while n - start >= max_size:
+            hasher.update(view[max(start, 0):start + max_size])
+            yield hasher.digest(), max_size
+            hasher = hashlib.blake2b(digest_size=8)
+            start += max_size
+        hasher.update(view[max(start, 0):])
+        length = n - start
+    if length:
+        yield hasher.digest(), length
+
+def analyze_chunks(folder_path, avg_size=8192, min_size=None, max_size=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Estimate block-level dedup savings below folder_path.
+
+    Files are streamed through iter_chunks and every chunk digest is kept in one
+    set, so memory grows with the number of unique chunks, not with file sizes.
+    A chunk already in the set counts as a duplicate of the directory holding the
+    file. Hardlinks are counted once. Returns a dict with overall totals and
+    "directories": {dir: [total_bytes, duplicate_bytes]}.
+    """
+    min_size = min_size or avg_size // 4
+    max_size = max_size or avg_size * 8
+    seen_chunks = set()
+    seen_inodes = set()
+    directories = defaultdict(lambda: [0, 0])
+    report = {"files": 0, "chunks": 0, "unique_chunks": 0, "total_bytes": 0, "duplicate_bytes": 0}
+    for path, st in iter_files(folder_path):
+        inode = (st.st_dev, st.st_ino)
+        if inode in seen_inodes:
+            continue
+        seen_inodes.add(inode)
+        totals = directories[os.path.dirname(path)]
+        try:
+            with open(path, "rb") as f:
+                for digest, length in iter_chunks(f, avg_size, min_size, max_size, buffer_size):
+                    report["chunks"] += 1
+                    totals[0] += length
+                    if digest in seen_chunks:
+                        totals[1] += length
+                        report["duplicate_bytes"] += length
+                    else:
+                        seen_chunks.add(digest)
+                        report["unique_chunks"] += 1
+                    report["total_bytes"] += length
+        except OSError:
+            continue
+        report["files"] += 1
+    report["directories"] = dict(directories)
+    return report
+
+def display_chunk_report(report, top=20):
+    total, dup = report["total_bytes"], report["duplicate_bytes"]
+    if not total:
+        print("✅ No data to analyse.")
+        return
+    print(f"\n🧩 Block-level analysis of {report['files']} files, {format_bytes(total)}:")
+    print(f"   {report['chunks']} chunks, {report['unique_chunks']} unique")
+    print(f"   Potential dedup savings: {format_bytes(dup)} ({100 * dup / total:.1f}%)\n")
+    ranked = sorted(report["directories"].items(), key=lambda item: item[1][1], reverse=True)
+    print("Top directories by savings:")
+    for directory, (dir_total, dir_dup) in ranked[:top]:
+        if not dir_dup:
+            break
+        print(f"  {format_bytes(dir_dup):>10} of {format_bytes(dir_total):>10}  {directory}")
+
+def find_duplicate_directories(folder_path, duplicates):
+    """Collapse duplicate files that belong to identical directory trees.
+
+    duplicates is the result of find_hash_duplicates for the same folder_path.
+    One bottom-up walk gives every directory a Merkle hash of its children's
+    names and content keys; a directory holding any file without a duplicate
+    can have no twin and is skipped. Identical trees are reported once, at the
+    highest level where they match, as "dir:<hash>" groups. Returns
+    (directory_groups, remaining_file_groups), where the file groups no longer
+    list files that sit inside the extra copies of a duplicated directory.
+    """
+    content_key = {path: key for key, paths in duplicates.items() for path in paths}
+    dir_hash = {}
+    has_files = {}
+    for root, dirs, files in os.walk(folder_path, topdown=False):
+        entries = []
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                # By target, like directory links: a link never matches the file it points to
+                entries.append(f"l\0{name}\0{os.readlink(path)}")
+                continue
+            key = content_key.get(path)
+            if key is None:
+                break
+            entries.append(f"f\0{name}\0{key}")
+        else:
+            for name in dirs:
+                path = os.path.join(root, name)
+                if os.path.islink(path):
+                    entries.append(f"l\0{name}\0{os.readlink(path)}")
+                elif dir_hash.get(path) is None:
+                    break
+                else:
+                    entries.append(f"d\0{name}\0{dir_hash[path]}")
+            else:
+                entries.sort()
+                dir_hash[root] = hashlib.sha256("\n".join(entries).encode("utf-8", "surrogateescape")).hexdigest()
+                has_files[root] = bool(files) or any(has_files.get(os.path.join(root, d)) for d in dirs)
+                continue
+        dir_hash[root] = None
+
+    by_hash = defaultdict(list)
+    for path, h in dir_hash.items():
+        if h is not None and has_files[path] and path != folder_path:
+            by_hash[h].append(path)
+    groups = {h: sorted(paths) for h, paths in by_hash.items() if len(paths) > 1}
+    duplicated = {path for paths in groups.values() for path in paths}
+    # A group is implied by its parents' group when every member's parent is itself duplicated
+    directory_groups = {f"dir:{h}": paths for h, paths in groups.items()
+                        if not all(os.path.dirname(p) in duplicated for p in paths)}
+
+    kept_copies = tuple(os.path.join(paths[0], "") for paths in directory_groups.values())
+    extra_copies = tuple(os.path.join(p, "") for paths in directory_groups.values() for p in paths[1:])
+    remaining = {}
+    for key, paths in duplicates.items():
+        kept = [p for p in paths if not p.startswith(extra_copies)] if extra_copies else paths
+        if len(kept) > 1:
+            # List files inside a kept directory first so deleting duplicates leaves that tree whole
+            remaining[key] = sorted(kept, key=lambda p: not p.startswith(kept_copies)) if kept_copies else kept
+    return directory_groups, remaining
+
+MANIFEST_HEADER = "#find_duplicates-manifest v1"
+
+def _escape_path(path):
+    return path.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+_UNESCAPES = {"\\": "\\", "n": "\n", "t": "\t"}
+
+def _unescape_path(text):
+    # One pass, so the "\\" + "n" of an escaped backslash is not read as a newline
+    return re.sub(r"\\([\\nt])", lambda m: _UNESCAPES[m.group(1)], text)
+
+def _open_manifest(path, mode):
+    opener = gzip.open if path.endswith(".gz") else open
+    return opener(path, mode + "t", encoding="utf-8", errors="surrogateescape", newline="\n")
+
+def export_manifest(folder_path, manifest_path, host=None, algorithm=DEFAULT_ALGORITHM,
+                    buffer_size=DEFAULT_BUFFER_SIZE, workers=None, show_progress=False, cache_path=None):
+    """Hash every file below folder_path and write a manifest sorted by (size, hash, path).
+
+    Each line is "<size>\\t<hash>\\t<path>" with the size zero-padded so the text
+    order matches the numeric order, which lets merge_manifests stream-join
+    manifests from several hosts. A ".gz" manifest_path is gzip-compressed.
+    Hardlinks are hashed once; cache_path reuses digests like scan_folder.
+    Returns the number of files written.
+    """
+    host = host or socket.gethostname()
+    folder_path = os.path.abspath(folder_path)
+    entries = list(iter_files(folder_path))
+    inodes = {}  # (dev, ino) -> (stat_result, paths)
+    for path, st in entries:
+        inodes.setdefault((st.st_dev, st.st_ino), (st, []))[1].append(path)
+
+    cache = HashCache(cache_path) if cache_path else None
+    digests = {}
+    to_hash = {}
+    for inode, (st, paths) in inodes.items():
+        digest = cache.get(st, algorithm, "full") if cache else None
+        if digest:
+            digests[inode] = digest
+        else:
+            to_hash[paths[0]] = inode
+    hashed = hash_files(to_hash, algorithm, buffer_size, workers, show_progress,
+                        total_bytes=sum(inodes[i][0].st_size for i in to_hash.values()))
+    for path, digest in hashed.items():
+        if digest:
+            inode = to_hash[path]
+            digests[inode] = digest
+            if cache:
+                cache.put(inodes[inode][0], path, algorithm, "full", digest)
+    if cache:
+        cache.prune(folder_path, {inode: st for inode, (st, _) in inodes.items()})
+        cache.report()
+        cache.close()
+
+    rows = sorted((inodes[inode][0].st_size, digest, path)
+                  for inode, digest in digests.items() for path in inodes[inode][1])
+    with _open_manifest(manifest_path, "w") as out:
+        out.write(f"{MANIFEST_HEADER}\t{host}\t{algorithm}\n")
+        for size, digest, path in rows:
+            out.write(f"{size:020d}\t{digest}\t{_escape_path(path)}\n")
+    return len(rows)
+
+def read_manifest(manifest_path):
+    """Return (host, algorithm, records) where records lazily yields (size, hash, host, path)."""
+    f = _open_manifest(manifest_path, "r")
+    header = f.readline().rstrip("\n").split("\t")
+    if len(header) != 3 or header[0] != MANIFEST_HEADER:
+        f.close()
+        raise ValueError(f"{manifest_path} is not a find_duplicates manifest.")
+    _, host, algorithm = header
+
+    def records():
+        with f:
+            for line in f:
+                size, digest, path = line.rstrip("\n").split("\t", 2)
+                yield int(size), digest, host, _unescape_path(path)
+    return host, algorithm, records()
+
+def merge_manifests(manifest_paths, min_hosts=2):
+    """Stream-join sorted manifests and yield cross-host duplicate groups.
+
+    A k-way heap merge reads one line at a time from every manifest, so memory
+    does not depend on manifest size. Yields (size, hash, [(host, path), ...])
+    for each content that appears on at least min_hosts distinct hosts.
+    """
+    manifests = [read_manifest(path) for path in manifest_paths]
+    algorithms = {algorithm for _, algorithm, _ in manifests}
+    if len(algorithms) > 1:
+        raise ValueError(f"Manifests use different hash algorithms: {', '.join(sorted(algorithms))}")
+
+    group_key, group = None, []
+    for size, digest, host, path in heapq.merge(*(records for _, _, records in manifests),
+                                                key=lambda r: (r[0], r[1])):
+        if (size, digest) != group_key:
+            if len({h for h, _ in group}) >= min_hosts:
+                yield group_key[0], group_key[1], group
+            group_key, group = (size, digest), []
+        group.append((host, path))
+    if group and len({h for h, _ in group}) >= min_hosts:
+        yield group_key[0], group_key[1], group
+
+def display_manifest_groups(groups):
+    count = 0
+    for size, digest, members in groups:
+        if not count:
+            print("\n🔍 Cross-host Duplicates Found:\n")
+        count += 1
+        hosts = len({host for host, _ in members})
+        print(f"Group ({len(members)} files on {hosts} hosts, {format_bytes(size)} each):")
+        for host, path in members:
+            print(f"   {host}:{path}")
+        print("-" * 60)
+    if not count:
+        print("✅ No cross-host duplicates found.")
+
+def scan_folder(folder_path, mode="hash", algorithm=DEFAULT_ALGORITHM, buffer_size=DEFAULT_BUFFER_SIZE,
+                workers=None, show_progress=False, cache_path=None, max_distance=6, group_directories=False):
+    """Scan folder and find duplicates based on mode ('name', 'size', 'hash' or 'phash').
+
+    In hash mode, cache_path names an SQLite file that keeps digests between runs,
+    and group_directories reports identical directory trees as single groups
+    (see find_duplicate_directories) ahead of the remaining file groups.
+    phash mode finds near-duplicate images within max_distance bits of each other.
+    """
+    if mode == "phash":
+        return find_similar_images(folder_path, max_distance, workers)
+    if mode == "hash":
+        if group_directories:
+            folder_path = os.path.abspath(folder_path)
+        cache = HashCache(cache_path) if cache_path else None
+        try:
+            duplicates = find_hash_duplicates(folder_path, algorithm=algorithm, buffer_size=buffer_size,
+                                              workers=workers, show_progress=show_progress, cache=cache)
+        finally:
+            if cache:
+                cache.report()
+                cache.close()
+        if group_directories:
+            directory_groups, file_groups = find_duplicate_directories(folder_path, duplicates)
+            return {**directory_groups, **file_groups}
+        return duplicates
     duplicates = defaultdict(list)
     for root, _, files in os.walk(folder_path):
         for file in files:
@@ -26,12 +739,8 @@ def scan_folder(folder_path, mode="hash"):
                     key = os.path.getsize(file_path)
                 except OSError:
                     continue
-            elif mode == "hash":
-                key = get_file_hash(file_path)
-                if not key:
-                    continue
             else:
-                raise ValueError("Mode must be 'name', 'size', or 'hash'.")
+                raise ValueError("Mode must be 'name', 'size', 'hash' or 'phash'.")
             duplicates[key].append(file_path)
     return {k: v for k, v in duplicates.items() if len(v) > 1}
 
@@ -41,7 +750,8 @@ def display_duplicates(duplicates):
         return
     print("\n🔍 Duplicate Files Found:\n")
     for group, files in duplicates.items():
-        print(f"Group ({len(files)} files):")
+        kind = "directories" if str(group).startswith("dir:") else "files"
+        print(f"Group ({len(files)} {kind}):")
         for f in files:
             print("  ", f)
         print("-" * 60)
@@ -52,22 +762,80 @@ def delete_duplicates(duplicates):
         print(f"\nKeeping: {keep}")
         for f in files[1:]:
             try:
-                os.remove(f)
+                if os.path.isdir(f) and not os.path.islink(f):
+                    shutil.rmtree(f)
+                else:
+                    os.remove(f)
                 print(f"🗑 Deleted duplicate: {f}")
             except Exception as e:
                 print(f"⚠️ Could not delete {f}: {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find and manage duplicate files.")
+    parser.add_argument("folder", nargs="?", help="folder to scan (prompted for if omitted)")
+    parser.add_argument("--mode", choices=["name", "size", "hash", "phash", "chunks"], help="comparison mode")
+    parser.add_argument("--algorithm", default=DEFAULT_ALGORITHM,
+                        help="hashlib algorithm for hash mode, e.g. sha256, blake2b (default: %(default)s)")
+    parser.add_argument("--buffer-mb", type=float, default=DEFAULT_BUFFER_SIZE / (1 << 20),
+                        help="read buffer size per thread in MB (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of hashing threads (processes in phash mode)")
+    parser.add_argument("--max-distance", type=int, default=6,
+                        help="phash mode: max differing bits for images to count as similar (default: %(default)s)")
+    parser.add_argument("--chunk-kb", type=int, default=8,
+                        help="chunks mode: average chunk size in KB, a power of two (default: %(default)s)")
+    parser.add_argument("--dirs", action="store_true",
+                        help="hash mode: report identical directory trees as one group")
+    parser.add_argument("--cache", metavar="DB", help="SQLite hash cache to reuse digests between runs")
+    parser.add_argument("--export-manifest", metavar="FILE",
+                        help="hash every file and write a sorted manifest (.gz to compress), then exit")
+    parser.add_argument("--host", help="host name recorded in the manifest (default: this machine's name)")
+    parser.add_argument("--merge-manifests", nargs="+", metavar="FILE",
+                        help="stream-join manifests from several hosts and list cross-host duplicates")
+    parser.add_argument("--no-progress", action="store_true", help="hide the live hashing progress line")
+    args = parser.parse_args(argv)
+    if args.algorithm not in hashlib.algorithms_available:
+        parser.error(f"unknown hash algorithm: {args.algorithm}")
+    if not hashlib.new(args.algorithm).digest_size:
+        # shake_128/shake_256 have no fixed length, so hexdigest() would need one
+        parser.error(f"{args.algorithm} has a variable-length digest; choose a fixed-length algorithm")
+    return args
+
 if __name__ == "__main__":
-    folder = input("Enter folder path to scan: ").strip()
-    print("\nSelect comparison mode:")
-    print("1. By name\n2. By size\n3. By hash (recommended)")
-    mode_choice = input("Enter choice (1/2/3): ").strip()
-    mode = {"1": "name", "2": "size", "3": "hash"}.get(mode_choice, "hash")
+    args = parse_args()
+    if args.merge_manifests:
+        display_manifest_groups(merge_manifests(args.merge_manifests))
+        sys.exit()
+    folder = args.folder or input("Enter folder path to scan: ").strip()
+    if args.export_manifest:
+        written = export_manifest(folder, args.export_manifest, args.host, args.algorithm,
+                                  max(int(args.buffer_mb * (1 << 20)), 4096), args.workers,
+                                  not args.no_progress and sys.stdout.isatty(), args.cache)
+        print(f"✅ Wrote {written} entries to {args.export_manifest}")
+        sys.exit()
+    mode = args.mode
+    if not mode:
+        print("\nSelect comparison mode:")
+        print("1. By name\n2. By size\n3. By hash (recommended)\n4. Similar images (perceptual hash, no deletion)")
+        print("5. Block-level dedup analysis (no deletion)")
+        mode_choice = input("Enter choice (1/2/3/4/5): ").strip()
+        mode = {"1": "name", "2": "size", "3": "hash", "4": "phash", "5": "chunks"}.get(mode_choice, "hash")
+
+    if mode == "chunks":
+        display_chunk_report(analyze_chunks(folder, args.chunk_kb * 1024))
+        sys.exit()
 
-    duplicates = scan_folder(folder, mode)
+    duplicates = scan_folder(folder, mode, algorithm=args.algorithm,
+                             buffer_size=max(int(args.buffer_mb * (1 << 20)), 4096),
+                             workers=args.workers, show_progress=not args.no_progress and sys.stdout.isatty(),
+                             cache_path=args.cache, max_distance=args.max_distance,
+                             group_directories=args.dirs)
     display_duplicates(duplicates)
 
-    if duplicates:
+    if duplicates and mode == "phash":
+        # Similar is not identical: the copy kept could be a thumbnail of the deleted original
+        print("\nSimilar images are listed for review only; nothing is deleted in this mode.")
+    elif duplicates:
         action = input("\nDo you want to delete duplicates? (y/n): ").strip().lower()
         if action == "y":
             delete_duplicates(duplicates)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Regression tests for find_duplicates.py
+=======================================
+Run with `python test_find_duplicates.py` (or pytest). Only needs the standard library.
+"""
+
+import os
+import tempfile
+
+from find_duplicates import find_hash_duplicates, find_duplicate_directories
+
+
+def test_symlink_is_not_a_duplicate_of_its_target():
+    """A/data.bin -> ../B/data.bin must not make A and B identical directories."""
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "A"))
+        os.makedirs(os.path.join(root, "B"))
+        with open(os.path.join(root, "B", "data.bin"), "wb") as f:
+            f.write(os.urandom(200_000))
+        os.symlink(os.path.join("..", "B", "data.bin"), os.path.join(root, "A", "data.bin"))
+
+        duplicates = find_hash_duplicates(root)
+        assert duplicates == {}, duplicates
+        directory_groups, file_groups = find_duplicate_directories(root, duplicates)
+        assert directory_groups == {}, directory_groups
+        assert file_groups == {}, file_groups
+
+
+def test_identical_directories_are_still_grouped():
+    with tempfile.TemporaryDirectory() as root:
+        data = os.urandom(200_000)
+        for name in ("A", "B"):
+            os.makedirs(os.path.join(root, name))
+            with open(os.path.join(root, name, "data.bin"), "wb") as f:
+                f.write(data)
+
+        directory_groups, file_groups = find_duplicate_directories(root, find_hash_duplicates(root))
+        assert list(directory_groups.values()) == [[os.path.join(root, "A"), os.path.join(root, "B")]]
+        assert file_groups == {}
+
+
+def main():
+    tests = [test_symlink_is_not_a_duplicate_of_its_target, test_identical_directories_are_still_grouped]
+    for test in tests:
+        test()
+        print("✓", test.__name__)
+
+
+if __name__ == "__main__":
+    main()
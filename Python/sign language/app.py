@@ -1,13 +1,23 @@
 from function import *
-from keras.utils import to_categorical
-from keras.models import model_from_json
-from keras.layers import LSTM, Dense
-from keras.callbacks import TensorBoard
-json_file = open("model.json", "r")
-model_json = json_file.read()
-json_file.close()
-model = model_from_json(model_json)
-model.load_weights("model.h5")
+from inference import load_backend, RingBuffer
+import argparse
+import time
+
+parser = argparse.ArgumentParser(description='Recognise signs live from the webcam')
+parser.add_argument('--backend', choices=['numpy', 'keras', 'tflite'], default='numpy',
+                    help='numpy: streaming LSTM (default); keras: full window with Keras; '
+                         'tflite: full window with the TFLite interpreter (see export_tflite.py)')
+parser.add_argument('--tflite-model', default='model.tflite', help='model for --backend tflite')
+parser.add_argument('--lanes', type=int, default=2,
+                    help='staggered LSTM states (1 = cheapest, 30 = same result as predicting on the '
+                         'full 30-frame window every frame; default: 2)')
+args = parser.parse_args()
+
+# The numpy backend runs the LSTM stack from model.json/model.h5 one frame at a time
+# instead of predicting on the whole 30-frame window for every frame
+start = time.perf_counter()
+model = load_backend(args.backend, lanes=args.lanes, tflite_path=args.tflite_model)
+print("Loaded {} backend in {:.2f} s".format(args.backend, time.perf_counter() - start))
 
 colors = []
 for i in range(0,20):
@@ -18,28 +28,31 @@ def prob_viz(res, actions, input_frame, colors,threshold):
     for num, prob in enumerate(res):
         cv2.rectangle(output_frame, (0,60+num*40), (int(prob*100), 90+num*40), colors[num], -1)
         cv2.putText(output_frame, actions[num], (0, 85+num*40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2, cv2.LINE_AA)
-        
+
     return output_frame
 
 
 # 1. New detection variables
-sequence = []
 sentence = []
 accuracy=[]
-predictions = []
-threshold = 0.8 
+predictions = RingBuffer(10, actions.shape[0])  # last 10 probability vectors, for smoothing
+timings = RingBuffer(60, 2)                     # (inference seconds, frame seconds) of the last 60 frames
+threshold = 0.8
 
 cap = cv2.VideoCapture(0)
 # cap = cv2.VideoCapture("https://192.168.43.41:8080/video")
-# Set mediapipe model 
+# Set mediapipe model
 with mp_hands.Hands(
     model_complexity=0,
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5) as hands:
+    last_frame = time.perf_counter()
     while cap.isOpened():
 
         # Read feed
         ret, frame = cap.read()
+        if not ret:
+            break
 
         # Make detections
         cropframe=frame[40:400,0:300]
@@ -48,46 +61,54 @@ with mp_hands.Hands(
         # frame=cv2.putText(frame,"Active Region",(75,25),cv2.FONT_HERSHEY_COMPLEX_SMALL,2,255,2)
         image, results = mediapipe_detection(cropframe, hands)
         # print(results)
-        
+
         # Draw landmarks
         # draw_styled_landmarks(image, results)
         # 2. Prediction logic
         keypoints = extract_keypoints(results)
-        sequence.append(keypoints)
-        sequence = sequence[-30:]
-
-        try: 
-            if len(sequence) == 30:
-                res = model.predict(np.expand_dims(sequence, axis=0))[0]
-                print(actions[np.argmax(res)])
-                predictions.append(np.argmax(res))
-                
-                
-            #3. Viz logic
-                if np.unique(predictions[-10:])[0]==np.argmax(res): 
-                    if res[np.argmax(res)] > threshold: 
-                        if len(sentence) > 0: 
-                            if actions[np.argmax(res)] != sentence[-1]:
-                                sentence.append(actions[np.argmax(res)])
-                                accuracy.append(str(res[np.argmax(res)]*100))
-                        else:
+        start = time.perf_counter()
+        if keypoints is None:
+            # No hand: start over, as a window containing this frame could not be predicted before either
+            model.reset()
+            predictions.clear()
+            res = None
+        else:
+            res = model.step(keypoints)
+        inference_time = time.perf_counter() - start
+
+        if res is not None:
+            print(actions[np.argmax(res)])
+            predictions.append(res)
+
+        #3. Viz logic
+            # Only accept a letter once the last 10 predictions agree on it
+            if (predictions.values().argmax(axis=1) == np.argmax(res)).all():
+                if res[np.argmax(res)] > threshold:
+                    if len(sentence) > 0:
+                        if actions[np.argmax(res)] != sentence[-1]:
                             sentence.append(actions[np.argmax(res)])
-                            accuracy.append(str(res[np.argmax(res)]*100)) 
-
-                if len(sentence) > 1: 
-                    sentence = sentence[-1:]
-                    accuracy=accuracy[-1:]
-
-                # Viz probabilities
-                # frame = prob_viz(res, actions, frame, colors,threshold)
-        except Exception as e:
-            # print(e)
-            pass
-            
+                            accuracy.append(str(res[np.argmax(res)]*100))
+                    else:
+                        sentence.append(actions[np.argmax(res)])
+                        accuracy.append(str(res[np.argmax(res)]*100))
+
+            if len(sentence) > 1:
+                sentence = sentence[-1:]
+                accuracy=accuracy[-1:]
+
+            # Viz probabilities
+            # frame = prob_viz(predictions.mean(), actions, frame, colors,threshold)
+
+        now = time.perf_counter()
+        timings.append((inference_time, now - last_frame))
+        last_frame = now
+        inference_ms, frame_time = timings.mean()
         cv2.rectangle(frame, (0,0), (300, 40), (245, 117, 16), -1)
-        cv2.putText(frame,"Output: -"+' '.join(sentence)+''.join(accuracy), (3,30), 
+        cv2.putText(frame,"Output: -"+' '.join(sentence)+''.join(accuracy), (3,30),
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2, cv2.LINE_AA)
-        
+        cv2.putText(frame, "{:.2f} ms/frame inference, {:.1f} FPS".format(inference_ms * 1000, 1 / max(frame_time, 1e-9)),
+                    (3, 420), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (245, 117, 16), 1, cv2.LINE_AA)
+
         # Show to screen
         cv2.imshow('OpenCV Feed', frame)
 
@@ -95,4 +116,8 @@ with mp_hands.Hands(
         if cv2.waitKey(10) & 0xFF == ord('q'):
             break
     cap.release()
-    cv2.destroyAllWindows()
\ No newline at end of file
+    cv2.destroyAllWindows()
+    if timings.count:
+        inference_ms, frame_time = timings.mean()
+        print("Inference: {:.2f} ms/frame, {:.1f} FPS (last {} frames)".format(
+            inference_ms * 1000, 1 / max(frame_time, 1e-9), len(timings.values())))
@@ -1,196 +1,115 @@
 from function import *
-
-from time import sleep
-
-
-
-for action in actions: 
-
-    for sequence in range(no_sequences):
-
-        try: 
-
-            os.makedirs(os.path.join(DATA_PATH, action, str(sequence)))
-
-        except:
-
-            pass
-
-
-
-# cap = cv2.VideoCapture(0)
-
-# Set mediapipe model 
-
-with mp_hands.Hands(
-
-    model_complexity=0,
-
-    min_detection_confidence=0.5,
-
-    min_tracking_confidence=0.5) as hands:
-
-    
-
-    # NEW LOOP
-
-    # Loop through actions
-
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataset import write_dataset
+
+IMAGE_PATH = os.path.join('Image')
+
+# One MediaPipe Hands graph per worker process, created by init_worker
+hands = None
+
+
+def init_worker():
+    global hands
+    # Each image is detected once, on its own, so use static mode; the landmark model
+    # matches the one app.py runs live, so training and live keypoints agree
+    hands = mp_hands.Hands(
+        static_image_mode=True,
+        model_complexity=0,
+        min_detection_confidence=0.5)
+
+
+def detect_image(task):
+    """Run hand detection once on Image/<action>/<sequence>.png.
+
+    Returns (action, sequence, keypoints), with keypoints None when no hand is
+    found and False when the image cannot be read.
+    """
+    action, sequence = task
+    frame = cv2.imread(os.path.join(IMAGE_PATH, action, '{}.png'.format(sequence)))
+    if frame is None:
+        return action, sequence, False
+    image, results = mediapipe_detection(frame, hands)
+    return action, sequence, extract_keypoints(results)
+
+
+def save_sequence(action, sequence, keypoints):
+    # Every frame of a sequence comes from the same still image, so the keypoints are shared
+    for frame_num in range(sequence_length):
+        npy_path = os.path.join(DATA_PATH, action, str(sequence), str(frame_num))
+        np.save(npy_path, keypoints)
+
+
+def extract_dataset(workers=None, packed=False):
+    """Detect every source image once, on a pool of processes, and write all its frames.
+
+    With packed=True the frames go to the packed dataset (DATASET_FILE) instead
+    of one .npy file per frame under MP_Data.
+    Returns (images processed, images without a detected hand, missing images).
+    """
+    tasks = [(action, sequence) for action in actions for sequence in range(no_sequences)]
+    found = {}
+    no_hand, missing = 0, 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        for action, sequence, keypoints in pool.map(detect_image, tasks, chunksize=4):
+            if keypoints is False:
+                missing += 1
+                print('Missing image for {} sequence {}'.format(action, sequence))
+                continue
+            if keypoints is None:
+                # No hand found: store zeros so every sequence keeps its 30 frames
+                no_hand += 1
+                print('No hand detected in {} sequence {}'.format(action, sequence))
+                keypoints = np.zeros(21*3)
+            if packed:
+                found[(action, sequence)] = keypoints
+            else:
+                save_sequence(action, sequence, keypoints)
+    if packed:
+        write_dataset(list(found), lambda action, sequence: found[(action, sequence)])
+    return len(tasks) - missing, no_hand, missing
+
+
+def preview_dataset():
+    """The original interactive loop: show each image with its landmarks while extracting."""
+    init_worker()
     for action in actions:
-
-        # Loop through sequences aka videos
-
         for sequence in range(no_sequences):
-
-            # Loop through video length aka sequence length
-
-            for frame_num in range(sequence_length):
-
-
-
-                # Read feed
-
-                # ret, frame = cap.read()
-
-                frame=cv2.imread('Image/{}/{}.png'.format(action,sequence))
-
-                # frame=cv2.imread('{}{}.png'.format(action,sequence))
-
-                # frame=cv2.cvtColor(frame,cv2.COLOR_BGR2GRAY)
-
-
-
-                # Make detections
-
-                image, results = mediapipe_detection(frame, hands)
-
-#                 print(results)
-
-
-
-                # Draw landmarks
-
-                draw_styled_landmarks(image, results)
-
-                
-
-                # NEW Apply wait logic
-
-                if frame_num == 0:
-
-                    cv2.putText(image, 'STARTING COLLECTION', (120,200), 
-
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255, 0), 4, cv2.LINE_AA)
-
-                    cv2.putText(image, 'Collecting frames for {} Video Number {}'.format(action, sequence), (15,12), 
-
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
-
-                    # Show to screen
-
-                    cv2.imshow('OpenCV Feed', image)
-
-                    cv2.waitKey(200)
-
-                else: 
-
-                    cv2.putText(image, 'Collecting frames for {} Video Number {}'.format(action, sequence), (15,12), 
-
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
-
-                    # Show to screen
-
-                    cv2.imshow('OpenCV Feed', image)
-
-                
-
-                # NEW Export keypoints
-
-                keypoints = extract_keypoints(results)
-
-                npy_path = os.path.join(DATA_PATH, action, str(sequence), str(frame_num))
-
-                np.save(npy_path, keypoints)
-
-
-
-                # Break gracefully
-
-                if cv2.waitKey(10) & 0xFF == ord('q'):
-
-                    break
-
-                    
-
-    # cap.release()
-
+            frame = cv2.imread(os.path.join(IMAGE_PATH, action, '{}.png'.format(sequence)))
+            image, results = mediapipe_detection(frame, hands)
+            draw_styled_landmarks(image, results)
+            cv2.putText(image, 'Collecting frames for {} Video Number {}'.format(action, sequence), (15,12),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
+            cv2.imshow('OpenCV Feed', image)
+            keypoints = extract_keypoints(results)
+            save_sequence(action, sequence, keypoints if keypoints is not None else np.zeros(21*3))
+            # Break gracefully
+            if cv2.waitKey(10) & 0xFF == ord('q'):
+                cv2.destroyAllWindows()
+                return
     cv2.destroyAllWindows()
 
 
-
-
-
-from function import *
-from time import sleep
-
-for action in actions: 
-    for sequence in range(no_sequences):
-        try: 
-            os.makedirs(os.path.join(DATA_PATH, action, str(sequence)))
-        except:
-            pass
-
-# cap = cv2.VideoCapture(0)
-# Set mediapipe model 
-with mp_hands.Hands(
-    model_complexity=0,
-    min_detection_confidence=0.5,
-    min_tracking_confidence=0.5) as hands:
-    
-    # NEW LOOP
-    # Loop through actions
-    for action in actions:
-        # Loop through sequences aka videos
-        for sequence in range(no_sequences):
-            # Loop through video length aka sequence length
-            for frame_num in range(sequence_length):
-
-                # Read feed
-                # ret, frame = cap.read()
-                frame=cv2.imread('Image/{}/{}.png'.format(action,sequence))
-                # frame=cv2.imread('{}{}.png'.format(action,sequence))
-                # frame=cv2.cvtColor(frame,cv2.COLOR_BGR2GRAY)
-
-                # Make detections
-                image, results = mediapipe_detection(frame, hands)
-#                 print(results)
-
-                # Draw landmarks
-                draw_styled_landmarks(image, results)
-                
-                # NEW Apply wait logic
-                if frame_num == 0:
-                    cv2.putText(image, 'STARTING COLLECTION', (120,200), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255, 0), 4, cv2.LINE_AA)
-                    cv2.putText(image, 'Collecting frames for {} Video Number {}'.format(action, sequence), (15,12), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
-                    # Show to screen
-                    cv2.imshow('OpenCV Feed', image)
-                    cv2.waitKey(200)
-                else: 
-                    cv2.putText(image, 'Collecting frames for {} Video Number {}'.format(action, sequence), (15,12), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1, cv2.LINE_AA)
-                    # Show to screen
-                    cv2.imshow('OpenCV Feed', image)
-                
-                # NEW Export keypoints
-                keypoints = extract_keypoints(results)
-                npy_path = os.path.join(DATA_PATH, action, str(sequence), str(frame_num))
-                np.save(npy_path, keypoints)
-
-                # Break gracefully
-                if cv2.waitKey(10) & 0xFF == ord('q'):
-                    break
-                    
-    # cap.release()
-    cv2.destroyAllWindows()
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract hand keypoints from Image/ into MP_Data/')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of detection processes (default: CPU count)')
+    parser.add_argument('--preview', action='store_true',
+                        help='show every image with its landmarks instead of running headless')
+    parser.add_argument('--packed', action='store_true',
+                        help='write the packed {} dataset instead of MP_Data/'.format(DATASET_FILE))
+    args = parser.parse_args()
+
+    if not args.packed:
+        for action in actions:
+            for sequence in range(no_sequences):
+                os.makedirs(os.path.join(DATA_PATH, action, str(sequence)), exist_ok=True)
+
+    start = time.perf_counter()
+    if args.preview:
+        preview_dataset()
+    else:
+        done, no_hand, missing = extract_dataset(args.workers, args.packed)
+        print('Extracted {} images ({} without a hand, {} missing) in {:.1f} s'.format(
+            done, no_hand, missing, time.perf_counter() - start))
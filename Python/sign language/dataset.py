@@ -0,0 +1,92 @@
+from function import *
+import argparse
+
+# The packed dataset replaces MP_Data/<action>/<sequence>/<frame>.npy with two files:
+#   DATASET_FILE  - one (N, sequence_length, 63) float32 array, opened with mmap_mode='r'
+#   DATASET_INDEX - labels (N,), the action names they index, and the source of each row
+# Rows are stored in a shuffled order, so any contiguous slice is a random sample and
+# a train/validation split is just two slices (views of the memory map, no copies).
+
+label_map = {label:num for num, label in enumerate(actions)}
+
+
+def write_dataset(entries, load_frames, path=DATASET_FILE, index_path=DATASET_INDEX, seed=0):
+    """Write the packed dataset from a list of (action, sequence) entries.
+
+    load_frames(action, sequence) returns the (sequence_length, 63) keypoints of
+    one sequence, or a single (63,) frame that is repeated for every frame.
+    Rows are filled one at a time, so memory use does not grow with the dataset.
+    """
+    order = np.random.default_rng(seed).permutation(len(entries))
+    X = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                  shape=(len(entries), sequence_length, 21*3))
+    labels = np.empty(len(entries), dtype=np.int64)
+    sources = []
+    for row, i in enumerate(order):
+        action, sequence = entries[i]
+        X[row] = load_frames(action, sequence)
+        labels[row] = label_map[action]
+        sources.append('{}/{}'.format(action, sequence))
+    X.flush()
+    del X
+    np.savez(index_path, labels=labels, actions=actions, sources=np.array(sources))
+    return len(entries)
+
+
+def pack_tree(data_path=DATA_PATH, path=DATASET_FILE, index_path=DATASET_INDEX):
+    """Convert the MP_Data/<action>/<sequence>/<frame>.npy tree into the packed dataset."""
+    entries = [(action, sequence) for action in actions for sequence in range(no_sequences)
+               if os.path.isdir(os.path.join(data_path, action, str(sequence)))]
+
+    def load_frames(action, sequence):
+        return np.stack([np.load(os.path.join(data_path, action, str(sequence), "{}.npy".format(frame_num)))
+                         for frame_num in range(sequence_length)])
+
+    return write_dataset(entries, load_frames, path, index_path)
+
+
+def is_stale(data_path=DATA_PATH, path=DATASET_FILE):
+    """Return True when the packed dataset is missing or older than anything under data_path.
+
+    Directory mtimes are compared too, so removed sequences count as changes.
+    """
+    if not os.path.exists(path):
+        return True
+    packed = os.path.getmtime(path)
+    for root, _, files in os.walk(data_path):
+        if os.path.getmtime(root) > packed:
+            return True
+        for name in files:
+            if os.path.getmtime(os.path.join(root, name)) > packed:
+                return True
+    return False
+
+
+def validation_start(count, val_split=0.1):
+    """Return the first row of the validation slice: the last val_split of the rows, at least one."""
+    return count - max(1, round(count * val_split))
+
+
+def load_dataset(path=DATASET_FILE, index_path=DATASET_INDEX):
+    """Open the packed dataset without reading it into memory.
+
+    Returns (X, labels): X is a read-only memory map of shape (N, sequence_length, 63),
+    so slicing it only pages in the rows that are actually used.
+    """
+    X = np.load(path, mmap_mode='r')
+    with np.load(index_path) as index:
+        labels = index['labels']
+        saved_actions = index['actions']
+    if len(labels) != len(X):
+        raise ValueError('{} and {} do not match; rebuild the dataset'.format(path, index_path))
+    if list(saved_actions) != list(actions):
+        raise ValueError('{} was built for actions {}, not {}'.format(path, list(saved_actions), list(actions)))
+    return X, labels
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack MP_Data/ into {} + {}'.format(DATASET_FILE, DATASET_INDEX))
+    parser.add_argument('--data-path', default=DATA_PATH, help='tree of per-frame .npy files (default: MP_Data)')
+    args = parser.parse_args()
+    count = pack_tree(args.data_path)
+    print('Packed {} sequences into {} ({:.1f} MB)'.format(count, DATASET_FILE, os.path.getsize(DATASET_FILE) / 1e6))
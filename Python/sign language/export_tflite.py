@@ -0,0 +1,98 @@
+from function import *
+from dataset import load_dataset, validation_start
+from inference import load_layers, build_keras_model, load_backend
+import argparse
+import subprocess
+import sys
+import time
+
+
+def convert(quantize='none', json_path='model.json', weights_path='model.h5'):
+    """Convert the trained model to a TFLite flatbuffer.
+
+    quantize='dynamic' stores the weights as int8 (dequantized on the fly);
+    quantize='int8' also quantizes activations, calibrated on the landmark
+    dataset, while keeping float32 input and output so callers need no changes.
+    """
+    import tensorflow as tf
+
+    # Batch size 1 and unrolled LSTMs: only builtin ops, so the lightweight runtimes can run it
+    model = build_keras_model(load_layers(json_path, weights_path), batch_size=1, unroll=True)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ('dynamic', 'int8'):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'int8':
+        X, _ = load_dataset()
+        sample = np.random.default_rng(0).permutation(len(X))[:200]
+        converter.representative_dataset = lambda: ([X[i:i+1].astype(np.float32)] for i in sample)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+COLD_START = '''
+import time
+start = time.perf_counter()
+from inference import load_backend
+backend = load_backend({name!r}, tflite_path={path!r})
+backend.predict_window(__import__('numpy').zeros(({length}, 63), 'float32'))
+print(time.perf_counter() - start)
+'''
+
+
+def cold_start(name, tflite_path):
+    """Seconds from a fresh interpreter to the first prediction (imports and model loading included)."""
+    code = COLD_START.format(name=name, path=tflite_path, length=sequence_length)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def report(tflite_paths, runs=200, val_split=0.1):
+    """Compare accuracy, latency and cold start of Keras, the NumPy stream and each .tflite file.
+
+    Accuracy and agreement are measured on the validation slice that trainmodel.py
+    holds out (the last val_split of the packed rows), not on training data.
+    """
+    X, labels = load_dataset()
+    split = validation_start(len(X), val_split)
+    X_val, labels_val = X[split:], labels[split:]
+    backends = [('keras', 'keras', None), ('numpy', 'numpy', None)]
+    backends += [('tflite ' + path, 'tflite', path) for path in tflite_paths]
+    reference = None
+    print('Held-out rows: {} of {}'.format(len(X_val), len(X)))
+    print('{:<28} {:>9} {:>10} {:>12} {:>11}'.format('backend', 'accuracy', 'vs keras', 'latency ms', 'cold start'))
+    for label, name, path in backends:
+        backend = load_backend(name, tflite_path=path)
+        probs = np.stack([backend.predict_window(window) for window in X_val])
+        if reference is None:
+            reference = probs.argmax(axis=1)
+        start = time.perf_counter()
+        for num in range(runs):
+            backend.predict_window(X[num % len(X)])
+        latency = (time.perf_counter() - start) / runs
+        print('{:<28} {:>8.1%} {:>9.1%} {:>12.2f} {:>10.2f}s'.format(
+            label, (probs.argmax(axis=1) == labels_val).mean(), (probs.argmax(axis=1) == reference).mean(),
+            latency * 1000, cold_start(name, path)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export model.json/model.h5 to TFLite')
+    parser.add_argument('--quantize', choices=['none', 'dynamic', 'int8'], default='none',
+                        help='dynamic: int8 weights; int8: int8 weights and activations, '
+                             'calibrated on {} (default: none)'.format(DATASET_FILE))
+    parser.add_argument('-o', '--output', default='model.tflite', help='output file (default: model.tflite)')
+    parser.add_argument('--report', nargs='*', metavar='TFLITE',
+                        help='compare accuracy, latency and cold start against Keras '
+                             '(for the exported file, or the given .tflite files)')
+    parser.add_argument('--val-split', type=float, default=0.1,
+                        help='with --report, the held-out fraction trainmodel.py used (default: 0.1)')
+    args = parser.parse_args()
+
+    if args.report:
+        report(args.report, val_split=args.val_split)
+        sys.exit()
+    flatbuffer = convert(args.quantize)
+    with open(args.output, 'wb') as f:
+        f.write(flatbuffer)
+    print('Wrote {} ({:.0f} KB, quantize={})'.format(args.output, len(flatbuffer) / 1024, args.quantize))
+    if args.report is not None:
+        report([args.output], val_split=args.val_split)
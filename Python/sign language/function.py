@@ -35,6 +35,10 @@ def extract_keypoints(results):
 # Path for exported data, numpy arrays
 DATA_PATH = os.path.join('MP_Data') 
 
+# Packed dataset: every sequence in one memory-mapped array, plus its index (see dataset.py)
+DATASET_FILE = 'landmarks.npy'
+DATASET_INDEX = 'landmarks_index.npz'
+
 actions = np.array(['A','B','C'])
 
 no_sequences = 30
@@ -0,0 +1,264 @@
+import json
+import numpy as np
+
+# Only NumPy (plus h5py or a TFLite runtime) is needed here, not MediaPipe or TensorFlow,
+# so the recognizer starts quickly. WINDOW matches sequence_length in function.py.
+WINDOW = 30
+
+
+def sigmoid(x):
+    # Same as 1 / (1 + exp(-x)), without overflowing for large negative x
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0),
+    'tanh': np.tanh,
+    'sigmoid': sigmoid,
+    'softmax': softmax,
+    'linear': lambda x: x,
+}
+
+
+def load_layers(json_path='model.json', weights_path='model.h5'):
+    """Read the layer stack of the trained Sequential model without Keras.
+
+    Returns a list of ('lstm', kernel, recurrent_kernel, bias, activation,
+    recurrent_activation) and ('dense', kernel, bias, activation) tuples, with
+    activations given by name.
+    Works with model.json/model.h5 written by Keras 2 and Keras 3, which store
+    the weights under different paths but both list them in the same order.
+    """
+    import h5py
+
+    with open(json_path) as json_file:
+        config = json.load(json_file)
+    layers = []
+    with h5py.File(weights_path, 'r') as weights_file:
+        group = weights_file['model_weights'] if 'model_weights' in weights_file else weights_file
+        for layer in config['config']['layers']:
+            kind, layer_config = layer['class_name'], layer['config']
+            if kind in ('InputLayer', 'Dropout'):
+                continue
+            weights_group = group[layer_config['name']]
+            weights = [np.asarray(weights_group[name], dtype=np.float32)
+                       for name in weights_group.attrs['weight_names']]
+            if kind == 'LSTM' and not layer_config.get('go_backwards'):
+                bias = weights[2] if layer_config.get('use_bias', True) else np.zeros(weights[0].shape[1], np.float32)
+                layers.append(('lstm', weights[0], weights[1], bias, layer_config['activation'],
+                               layer_config['recurrent_activation']))
+            elif kind == 'Dense':
+                bias = weights[1] if layer_config.get('use_bias', True) else np.zeros(weights[0].shape[1], np.float32)
+                layers.append(('dense', weights[0], bias, layer_config['activation']))
+            else:
+                raise ValueError('Unsupported layer for streaming inference: {}'.format(kind))
+    return layers
+
+
+def build_keras_model(layers, batch_size=None, unroll=False):
+    """Rebuild the trained model in the installed Keras version from load_layers() output.
+
+    A fixed batch_size with unroll=True gives a graph of plain matrix operations,
+    which TFLite converts to builtin ops only (no while loop or Select TF ops).
+    """
+    import keras
+
+    inputs = keras.Input(batch_shape=(batch_size, WINDOW, layers[0][1].shape[0]))
+    x = inputs
+    for num, layer in enumerate(layers):
+        if layer[0] == 'lstm':
+            _, kernel, recurrent_kernel, bias, activation, recurrent_activation = layer
+            last_lstm = not any(other[0] == 'lstm' for other in layers[num + 1:])
+            keras_layer = keras.layers.LSTM(recurrent_kernel.shape[0], activation=activation,
+                                            recurrent_activation=recurrent_activation,
+                                            return_sequences=not last_lstm, unroll=unroll)
+            weights = [kernel, recurrent_kernel, bias]
+        else:
+            _, kernel, bias, activation = layer
+            keras_layer = keras.layers.Dense(kernel.shape[1], activation=activation)
+            weights = [kernel, bias]
+        x = keras_layer(x)
+        keras_layer.set_weights(weights)
+    return keras.Model(inputs, x)
+
+
+def load_interpreter(path):
+    """Open a .tflite model with the lightest TFLite runtime that is installed."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+    interpreter = Interpreter(model_path=path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+class WindowModel:
+    """Keeps the last `window` frames in a ring buffer and predicts on the whole window every frame.
+
+    `predict` maps a (1, window, 63) float32 batch to class probabilities; this
+    is how the Keras and TFLite backends run, like app.py did originally.
+    """
+
+    def __init__(self, predict, window=WINDOW, width=21*3):
+        self.predict = predict
+        self.frames = RingBuffer(window, width)
+
+    def reset(self):
+        self.frames.clear()
+
+    def step(self, keypoints):
+        self.frames.append(keypoints)
+        if self.frames.count < len(self.frames.data):
+            return None
+        return self.predict_window(self.frames.values())
+
+    def predict_window(self, window):
+        return np.asarray(self.predict(np.asarray(window, dtype=np.float32)[None]))[0]
+
+
+def keras_backend(json_path='model.json', weights_path='model.h5'):
+    model = build_keras_model(load_layers(json_path, weights_path))
+    return WindowModel(lambda batch: model.predict(batch, verbose=0))
+
+
+def tflite_backend(path='model.tflite'):
+    interpreter = load_interpreter(path)
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+
+    def predict(batch):
+        interpreter.set_tensor(input_index, batch)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)
+
+    return WindowModel(predict)
+
+
+def load_backend(name, lanes=2, json_path='model.json', weights_path='model.h5', tflite_path='model.tflite'):
+    """Return the recognizer for a backend: 'numpy' (streaming), 'keras' or 'tflite'.
+
+    All of them have step(keypoints) -> probabilities or None, reset() and predict_window(window).
+    """
+    if name == 'numpy':
+        return StreamingModel.from_files(json_path, weights_path, lanes=lanes)
+    if name == 'keras':
+        return keras_backend(json_path, weights_path)
+    if name == 'tflite':
+        return tflite_backend(tflite_path)
+    raise ValueError('Unknown backend {!r}'.format(name))
+
+
+class StreamingModel:
+    """Runs the trained LSTM stack one frame at a time, keeping its state between frames.
+
+    model.predict on the last 30 frames recomputes all 30 recurrent steps for every
+    new frame. Here each LSTM keeps its (h, c) state and advances by a single step
+    per frame, in NumPy, so there is no per-call Keras overhead either.
+
+    The model was trained on windows that start from a zero state, so `lanes`
+    copies of the state run side by side (as one batch), staggered by
+    window / lanes frames, and each is reset after `window` frames. Predictions
+    come from the lane with the longest history, which has always seen between
+    window - window / lanes + 1 and `window` frames. lanes=1 is the cheapest;
+    lanes=window gives exactly what model.predict on the last `window` frames would.
+    """
+
+    def __init__(self, layers, window=WINDOW, lanes=2):
+        if not 1 <= lanes <= window:
+            raise ValueError('lanes must be between 1 and the window length')
+        self.layers = [layer[:4] + (ACTIVATIONS[layer[4]], ACTIVATIONS[layer[5]]) if layer[0] == 'lstm'
+                       else layer[:3] + (ACTIVATIONS[layer[3]],) for layer in layers]
+        self.window = window
+        self.lanes = lanes
+        self.stride = window // lanes
+        self.reset()
+
+    @classmethod
+    def from_files(cls, json_path='model.json', weights_path='model.h5', **kwargs):
+        return cls(load_layers(json_path, weights_path), **kwargs)
+
+    def reset(self):
+        """Forget all frames seen so far, e.g. when the hand leaves the picture."""
+        self.frames = 0
+        self.age = np.zeros(self.lanes, dtype=np.int64)
+        self.states = [(np.zeros((self.lanes, layer[2].shape[0]), np.float32),
+                        np.zeros((self.lanes, layer[2].shape[0]), np.float32))
+                       for layer in self.layers if layer[0] == 'lstm']
+
+    def step(self, keypoints):
+        """Feed one frame of keypoints; return the class probabilities, or None until a full window was seen."""
+        # Lane j starts a fresh window every `window` frames, offset by j * stride
+        if self.frames:
+            restart = (self.frames - np.arange(self.lanes) * self.stride) % self.window == 0
+            if restart.any():
+                self.age[restart] = 0
+                for h, c in self.states:
+                    h[restart] = 0
+                    c[restart] = 0
+        self.frames += 1
+        self.age += 1
+
+        x = np.broadcast_to(np.asarray(keypoints, dtype=np.float32), (self.lanes, self.layers[0][1].shape[0]))
+        states = iter(self.states)
+        lane = None
+        for layer in self.layers:
+            if layer[0] == 'lstm':
+                _, kernel, recurrent_kernel, bias, activation, recurrent_activation = layer
+                h, c = next(states)
+                z = x @ kernel + h @ recurrent_kernel + bias
+                i, f, g, o = np.split(z, 4, axis=1)
+                c[:] = recurrent_activation(f) * c + recurrent_activation(i) * activation(g)
+                h[:] = recurrent_activation(o) * activation(c)
+                x = h
+            else:
+                if lane is None:
+                    # The dense head only needs to run on the lane that is reported
+                    lane = int(np.argmax(self.age))
+                    x = x[lane:lane + 1]
+                _, kernel, bias, activation = layer
+                x = activation(x @ kernel + bias)
+        if self.frames < self.window:
+            return None
+        return x[0]
+
+    def predict_window(self, window):
+        """Predict on one complete window, from an empty state, like model.predict would."""
+        # Lane 0 is first reset after `window` frames, so it has seen exactly this window
+        self.reset()
+        for keypoints in window:
+            res = self.step(keypoints)
+        self.reset()
+        return res
+
+
+class RingBuffer:
+    """The last `size` rows of a fixed width, kept in one preallocated NumPy array."""
+
+    def __init__(self, size, width):
+        self.data = np.zeros((size, width), dtype=np.float32)
+        self.count = 0
+
+    def append(self, row):
+        self.data[self.count % len(self.data)] = row
+        self.count += 1
+
+    def clear(self):
+        self.count = 0
+
+    def values(self):
+        """The stored rows (oldest first once the buffer has wrapped around)."""
+        if self.count <= len(self.data):
+            return self.data[:self.count]
+        return np.roll(self.data, -(self.count % len(self.data)), axis=0)
+
+    def mean(self):
+        return self.values().mean(axis=0)
@@ -1,27 +1,71 @@
 from function import *
-from sklearn.model_selection import train_test_split
+from dataset import load_dataset, pack_tree, validation_start, is_stale
+import argparse
+import tensorflow as tf
 from keras.utils import to_categorical
 from keras.models import Sequential
 from keras.layers import LSTM, Dense
-from keras.callbacks import TensorBoard
-label_map = {label:num for num, label in enumerate(actions)}
-# print(label_map)
-sequences, labels = [], []
-for action in actions:
-    for sequence in range(no_sequences):
-        window = []
-        for frame_num in range(sequence_length):
-            res = np.load(os.path.join(DATA_PATH, action, str(sequence), "{}.npy".format(frame_num)))
-            window.append(res)
-        sequences.append(window)
-        labels.append(label_map[action])
-
-X = np.array(sequences)
-y = to_categorical(labels).astype(int)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.05)
+from keras.callbacks import TensorBoard, EarlyStopping, ModelCheckpoint
+
+parser = argparse.ArgumentParser(description='Train the sign-language LSTM on the packed landmark dataset')
+parser.add_argument('--epochs', type=int, default=200, help='maximum number of epochs (default: 200)')
+parser.add_argument('--batch-size', type=int, default=32, help='sequences per batch (default: 32)')
+parser.add_argument('--val-split', type=float, default=0.1, help='fraction kept for validation (default: 0.1)')
+parser.add_argument('--patience', type=int, default=20,
+                    help='stop after this many epochs without a better validation loss (default: 20)')
+parser.add_argument('--threads', type=int, default=0,
+                    help='CPU threads for TensorFlow ops and the input pipeline (default: all cores)')
+args = parser.parse_args()
+
+# Thread pools must be sized before TensorFlow runs its first op
+if args.threads:
+    tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    tf.config.threading.set_inter_op_parallelism_threads(max(1, args.threads // 2))
+
+# Build the packed dataset from MP_Data on first use, and again whenever data.py has
+# refreshed MP_Data since (python dataset.py does the same)
+if is_stale():
+    print('Packing {} into {}'.format(DATA_PATH, DATASET_FILE))
+    pack_tree()
+X, labels = load_dataset()
+y = to_categorical(labels, num_classes=actions.shape[0]).astype(np.float32)
+# Rows are stored shuffled, so the validation split is a slice: views of the memory map, no copies
+split = validation_start(len(X), args.val_split)
+
+
+def make_batches(start, stop, shuffle):
+    """Stream batches of rows [start, stop) from the memory map through a tf.data pipeline.
+
+    Only row indices go through shuffle and batch; each batch then gathers its
+    rows from the memory map on a parallel map call, and prefetch keeps the
+    next batches ready while the model trains on the current one.
+    """
+    def gather(idx):
+        idx = np.sort(idx)  # read the rows of a batch in file order
+        return X[idx], y[idx]
+
+    rows = tf.data.Dataset.range(start, stop)
+    if shuffle:
+        rows = rows.shuffle(stop - start, reshuffle_each_iteration=True)
+    batches = rows.batch(args.batch_size).map(
+        lambda idx: tf.numpy_function(gather, [idx], (tf.float32, tf.float32)),
+        num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle)
+    batches = batches.map(lambda xb, yb: (tf.ensure_shape(xb, (None,) + X.shape[1:]),
+                                          tf.ensure_shape(yb, (None, actions.shape[0]))))
+    options = tf.data.Options()
+    if args.threads:
+        options.threading.private_threadpool_size = args.threads
+    return batches.prefetch(tf.data.AUTOTUNE).with_options(options)
+
+
+train_batches = make_batches(0, split, shuffle=True)
+val_batches = make_batches(split, len(X), shuffle=False)
 
 log_dir = os.path.join('Logs')
 tb_callback = TensorBoard(log_dir=log_dir)
+# Stop once validation loss has stopped improving and keep the best weights, both in memory and on disk
+early_stop = EarlyStopping(monitor='val_loss', patience=args.patience, restore_best_weights=True, verbose=1)
+checkpoint = ModelCheckpoint('model.h5', monitor='val_loss', save_best_only=True)
 model = Sequential()
 model.add(LSTM(64, return_sequences=True, activation='relu', input_shape=(30,63)))
 model.add(LSTM(128, return_sequences=True, activation='relu'))
@@ -29,13 +73,14 @@ model.add(LSTM(64, return_sequences=False, activation='relu'))
 model.add(Dense(64, activation='relu'))
 model.add(Dense(32, activation='relu'))
 model.add(Dense(actions.shape[0], activation='softmax'))
-res = [.7, 0.2, 0.1]
 
 model.compile(optimizer='Adam', loss='categorical_crossentropy', metrics=['categorical_accuracy'])
-model.fit(X_train, y_train, epochs=200, callbacks=[tb_callback])
-model.summary()
-
 model_json = model.to_json()
 with open("model.json", "w") as json_file:
     json_file.write(model_json)
-model.save('model.h5')
\ No newline at end of file
+model.fit(train_batches, validation_data=val_batches, epochs=args.epochs,
+          callbacks=[tb_callback, early_stop, checkpoint])
+model.summary()
+# No final model.save: the checkpoint already wrote the best epoch to model.h5, and
+# EarlyStopping only restores those weights when it stops early, so saving here
+# would overwrite them with the last epoch after a run that reaches --epochs